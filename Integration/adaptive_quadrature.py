@@ -0,0 +1,160 @@
+import heapq
+import numpy as np
+import matplotlib.pyplot as plt
+
+from compound_quadrature import CompoundQuadrature
+
+class AdaptiveQuadrature(CompoundQuadrature):
+
+    name = "Adaptive Quadrature"
+
+    # Boole's rule on the 5 points of a subinterval [a, b], i.e. Simpson's rule on both halves plus its Richardson correction
+    boole_weights = np.array([7, 32, 12, 32, 7]) / 90
+
+    def __init__(self, D, f, var="x", verbose=False):
+        self.a, self.b = D
+
+        if self.a >= self.b:
+            raise ValueError(f"a ({self.a}) must be strictly less than b ({self.b})")
+        if not callable(f):
+            raise TypeError("f must be a function.")
+
+        # these are temporary values just to allow for the inheritance to work
+        super(AdaptiveQuadrature, self).__init__([self.a, self.b], f, var=var, verbose=verbose)
+        self.evaluations = 2
+
+        # f at the ends was just evaluated, integrate reuses it (self.F is overwritten by integrate)
+        self._F_ends = np.asarray(self.F, dtype=float)
+
+    @staticmethod
+    def _estimate(a, b, F):
+        """
+        the integral and error estimate on [a, b] from f at the points a, (3a+b)/4, (a+b)/2, (a+3b)/4, b
+            S1 = Simpson's rule on [a, b] (3 points), S2 = Simpson's rule on both halves (5 points)
+            the error of S2 is about (S2 - S1) / 15, and adding it gives Boole's rule
+        """
+        h = b - a
+        S1 = h/6 * (F[0] + 4*F[2] + F[4])
+        S2 = h/12 * (F[0] + 4*F[1] + 2*F[2] + 4*F[3] + F[4])
+        return S2 + (S2 - S1)/15, abs(S2 - S1)/15
+
+    def integrate(self, atol=1e-10, rtol=1e-10, max_evaluations=10000, initial_intervals=4):
+        """
+        adaptive Simpson's rule, always splitting the subinterval with the largest error estimate (kept in a heap)
+            every subinterval remembers f at its 5 points, so each split only evaluates the 4 new quarter points of its two halves
+            stops once the total error estimate is below max(atol, rtol * |integral|) or after max_evaluations evaluations of f
+        """
+        if initial_intervals < 1:
+            raise ValueError(f"initial_intervals must be at least 1. Currently {initial_intervals}")
+
+        # the interior points of the first subintervals are all evaluated with a single call to f, the ends are known already
+        X = np.linspace(self.a, self.b, 4*initial_intervals + 1)
+        F = np.concatenate(([self._F_ends[0]], self._evaluate(X[1:-1]), [self._F_ends[-1]]))
+        self.evaluations = len(X)
+
+        # (-error, count, X, F, integral), the count breaks ties so the arrays never get compared
+        heap = []
+        done = []
+        total, error = 0, 0
+        for k in range(initial_intervals):
+            X_sub, F_sub = X[4*k:4*k+5], F[4*k:4*k+5]
+            I_sub, E_sub = self._estimate(X_sub[0], X_sub[-1], F_sub)
+            heap.append( (-E_sub, k, X_sub, F_sub, I_sub) )
+            total += I_sub
+            error += E_sub
+        heapq.heapify(heap)
+        count = initial_intervals
+
+        self.converged = False
+        while heap:
+            if error <= max(atol, rtol * abs(total)):
+                self.converged = True
+                break
+            if self.evaluations + 4 > max_evaluations:
+                print(f"Warning: the evaluation budget ({max_evaluations}) ran out with an estimated error of {error}")
+                break
+
+            E_neg, _, X_sub, F_sub, I_sub = heapq.heappop(heap)
+            a, b = X_sub[0], X_sub[-1]
+
+            # the subinterval can't be split any further in floating point
+            if not a < X_sub[1] < X_sub[2] < X_sub[3] < b or (X_sub[1] - a) <= 4 * np.finfo(float).eps * max(abs(a), abs(b)):
+                done.append( (X_sub, F_sub) )
+                continue
+
+            # the new quarter points of the left [a, c] and right [c, b] halves
+            X_new = np.array([(3*a + X_sub[2])/4, (a + 3*X_sub[2])/4, (3*X_sub[2] + b)/4, (X_sub[2] + 3*b)/4])
+            F_new = self._evaluate(X_new)
+            self.evaluations += 4
+
+            total -= I_sub
+            error += E_neg
+            for X_half, F_half in [
+                ( np.array([a, X_new[0], X_sub[1], X_new[1], X_sub[2]]), np.array([F_sub[0], F_new[0], F_sub[1], F_new[1], F_sub[2]]) ),
+                ( np.array([X_sub[2], X_new[2], X_sub[3], X_new[3], b]), np.array([F_sub[2], F_new[2], F_sub[3], F_new[3], F_sub[4]]) ),
+            ]:
+                I_half, E_half = self._estimate(X_half[0], X_half[-1], F_half)
+                heapq.heappush(heap, (-E_half, count, X_half, F_half, I_half))
+                count += 1
+                total += I_half
+                error += E_half
+        else:
+            # every subinterval hit the floating point limit
+            self.converged = error <= max(atol, rtol * abs(total))
+
+        subintervals = done + [(X_sub, F_sub) for _, _, X_sub, F_sub, _ in heap]
+        subintervals.sort(key=lambda sub: sub[0][0])
+        self.error_estimate = error
+        self.subintervals = [(X_sub[0], X_sub[-1]) for X_sub, _ in subintervals]
+
+        # the points of all the subintervals (neighbours share their ends) with their total Boole weights
+        X_all = np.concatenate([X_sub for X_sub, _ in subintervals])
+        F_all = np.concatenate([F_sub for _, F_sub in subintervals])
+        A_all = np.concatenate([(X_sub[-1] - X_sub[0]) * self.boole_weights for X_sub, _ in subintervals])
+
+        self.X, index, inverse = np.unique(X_all, return_index=True, return_inverse=True)
+        self.F = F_all[index]
+        self.N = len(self.X)
+
+        if self.verbose:
+            self._separator()
+            print(f"{len(self.subintervals)} subintervals, {self.evaluations} evaluations of f, estimated error {error}")
+
+        # calling our generic quadrature integration approximation with the weight of every point
+        A = np.bincount(inverse.ravel(), weights=A_all, minlength=self.N)
+        return super(AdaptiveQuadrature, self).integrate(A=A)
+
+    def annotate_plot(self):
+        for a, b in self.subintervals:
+            plt.axvline(a, color='grey', alpha=0.3)
+        plt.axvline(self.b, color='grey', alpha=0.3)
+
+    def plot(self, N=1000, save=False):
+        # the number of subintervals is what's interesting here, not m
+        self.m = len(self.subintervals)
+        super(AdaptiveQuadrature, self).plot(N=N, save=save)
+
+
+if __name__ == "__main__":
+
+    from math import erf, sqrt, pi
+    from simpsons_rule import SimpsonsRule
+
+    # a narrow peak at x = c on top of sqrt(x), whose derivative blows up at 0
+    c, w = 1/sqrt(8), 1e-3
+    def f(x):
+        return np.exp(-((x - c)/w)**2) + np.sqrt(x)
+
+    exact = w*sqrt(pi)/2 * (erf((1 - c)/w) + erf(c/w)) + 2/3
+
+    # the first subintervals have to be fine enough to notice the peak at all
+    integrator = AdaptiveQuadrature((0, 1), f)
+    result = integrator.integrate(atol=0, rtol=1e-9, initial_intervals=16)
+    print(f"Adaptive:       {result} (error {abs(result - exact):.2e}) with {integrator.evaluations} evaluations")
+
+    # a uniform grid needs far more points for the same accuracy
+    for N in [1001, 10001, 100001, 1000001]:
+        result = SimpsonsRule(np.linspace(0, 1, N), f).integrate()
+        print(f"Simpson's Rule: {result} (error {abs(result - exact):.2e}) with {2*N - 1} evaluations")
+
+    integrator.plot()
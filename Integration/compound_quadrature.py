@@ -1,7 +1,6 @@
 import numpy as np
 import sympy as sym
 import matplotlib.pyplot as plt
-import types
 
 class CompoundQuadrature(object):
 
@@ -11,17 +10,20 @@ class CompoundQuadrature(object):
     # self.n = number of subintervals
     # self.m = number of points in each subinterval
 
+    # f is evaluated on at most this many nodes per call, None means all of them at once
+    chunk_size = None
+
     def __init__(self, X_known, F_known, var="x", verbose=False):
         
         if type(X_known) != list and not isinstance(X_known, np.ndarray):
             raise TypeError("X_known must be a list of x values.")
-        if list(sorted(set(X_known))) != list(X_known):
+        if np.any(np.diff(np.asarray(X_known, dtype=float)) <= 0):
             raise ValueError("X_known must be a strictly ascending list of values.")
         self.X = X_known
 
-        if isinstance(F_known, types.FunctionType):
+        if callable(F_known):
             self.f = F_known
-            self.F = [self.f(x) for x in X_known]
+            self.F = self._evaluate(X_known)
         elif type(F_known) == list or isinstance(F_known, np.ndarray):
             self.f = None
             self.F = F_known
@@ -36,37 +38,90 @@ class CompoundQuadrature(object):
         self.var = sym.Symbol(var)
         self.verbose = verbose
 
+    def _probe(self, X):
+        """
+        whether f works on numpy arrays, decided once per f by trying it on two of the nodes X
+            functions that only take scalars fail on an array with a TypeError (e.g. math.exp)
+            or a ValueError (e.g. an if statement, the truth value of an array is ambiguous),
+            or return a single value instead of one per node
+        any other error is a genuine one and is raised right away
+        returns f(X) when f is vectorized, so the caller can use those two values instead of evaluating them again
+        """
+        try:
+            F = np.asarray(self.f(X), dtype=float)
+        except (TypeError, ValueError):
+            F = None
+        if F is not None and F.shape != (2,):
+            F = None
+
+        self._vectorized_f, self._vectorized = self.f, F is not None
+        return F
+
+    def _evaluate(self, X):
+        """
+        f at all the nodes X
+            a single call with the whole array when f works on numpy arrays (e.g. np.exp),
+            otherwise one node at a time through np.vectorize (e.g. math.exp, or an f with an if statement)
+        """
+        X = np.asarray(X, dtype=float)
+
+        # the first call with a new f probes it on X[:2], and those values are kept rather than computed twice
+        F = []
+        if len(X) >= 2 and getattr(self, "_vectorized_f", None) is not self.f:
+            F_probe = self._probe(X[:2])
+            if F_probe is not None:
+                F, X = [F_probe], X[2:]
+
+        if not F and (len(X) < 2 or not self._vectorized):
+            return np.vectorize(self.f, otypes=[float])(X)
+
+        size = len(X) if self.chunk_size is None else self.chunk_size
+        F += [np.asarray(self.f(X[k:k+size]), dtype=float) for k in range(0, len(X), max(size, 1))]
+        return np.concatenate(F)
+
     @staticmethod
     def _separator():
         print()
         print('*'*100)
         print()
 
-    def _get_subintervals(self, m=None):
+    def _subinterval_blocks(self, m=None):
+        """
+        the node indices of the subintervals as 2-D arrays with one subinterval per row
+            every subinterval has m nodes and shares its ends with its neighbours,
+            except a shorter last one, which gets a block of its own
+        """
         if m is None:
             m = self.N
 
-        k = 0
-        subintervals = []
-        while k <= self.N - m:
-            subintervals.append( list(range(k, k+m)) )
-            k += (m-1)   
+        count = (self.N - m) // (m-1) + 1 if self.N >= m else 0
+        blocks = [(np.arange(count) * (m-1))[:, None] + np.arange(m)]
 
+        k = count * (m-1)
         if k != self.N-1:
             print(f"Warning: the last subinterval will be of length {self.N - k}, since an interval of length {self.N} cannot be evenly divided into subintervals of length {m}")
-            subintervals.append( list(range(k, self.N)) )
+            blocks.append( np.arange(k, self.N)[None, :] )
 
-        return subintervals
+        return blocks
+
+    def _get_subintervals(self, m=None):
+        return [list(I) for block in self._subinterval_blocks(m) for I in block]
 
     @staticmethod
-    def _integrate_subinterval(F, A):
+    def _integrate_subinterval(F, A, verbose=False):
         result = 0
         for Fi, Ai in zip(F, A):
             # regular quadrature approximation
             result += Fi * Ai
-            print(f"    + {Fi} * {Ai}")
+            if verbose:
+                print(f"    + {Fi} * {Ai}")
         return result
 
+    @property
+    def A(self):
+        # the weights of every subinterval, the blocks are split up only when asked for (e.g. by the plots)
+        return [list(A_sub) for A_block in self._A for A_sub in A_block]
+
     def integrate(self, A, m=None):
         if m is None:
             m = self.N
@@ -76,39 +131,51 @@ class CompoundQuadrature(object):
         if self.verbose:
             self._separator()
 
-        subintervals = self._get_subintervals(m)
+        blocks = self._subinterval_blocks(m)
 
-        # if A is a flat list, convert it into a list of subintervals
-        if len(A) == self.N:
-            A = [ [A[i] for i in I] for I in subintervals ]
+        # A is either one array of weights per block (like the blocks above), a flat list with a weight per point,
+        # or a list with the weights of each subinterval
+        if len(A) == len(blocks) and all(np.ndim(A_block) == 2 for A_block in A):
+            A = [np.asarray(A_block, dtype=float) for A_block in A]
+        elif len(A) == self.N:
+            A = [np.asarray(A, dtype=float)[block] for block in blocks]
+        else:
+            # checking that subintervals are correct
+            for A_sub in A[:-1]:
+                if len(A_sub) != m:
+                    raise ValueError(f"Length of each subinterval must be {m}. Currently {len(A_sub)}")
+            if len(A) != sum(len(block) for block in blocks):
+                raise ValueError(f"There must be a list of weights for each of the {sum(len(block) for block in blocks)} subintervals. Currently {len(A)}")
 
-        # checking that subintervals are correct
-        for A_sub in A[:-1]:
-            if len(A_sub) != m:
-                raise ValueError(f"Length of each subinterval must be {m}. Currently {len(A_sub)}")
+            starts = np.cumsum([0] + [len(block) for block in blocks])
+            A = [np.array(A[start:end], dtype=float).reshape(block.shape) for start, end, block in zip(starts[:-1], starts[1:], blocks)]
 
         # storing values for later
-        self.A = A
+        self._A = A
         self.m = m
 
+        if not self.verbose:
+            # the total weight of every point (the ends of the subintervals count twice), then a single dot product
+            indices = np.concatenate([block.ravel() for block in blocks])
+            W = np.bincount(indices, weights=np.concatenate([A_block.ravel() for A_block in A]), minlength=self.N)
+            return W @ np.asarray(self.F, dtype=float)
+
         # computing compound quadrature integral
         result = 0
-        for I, A_sub in zip(subintervals, self.A):
-            F_sub = [self.F[i] for i in I]
-            
-            if self.verbose:
+        for block, A_block in zip(blocks, A):
+            for I, A_sub in zip(block, A_block):
+                F_sub = [self.F[i] for i in I]
+
                 print(f"Subinterval: {[self.X[i] for i in I]}")
 
-            sub_integral = self._integrate_subinterval(F_sub, A_sub)
-            result += sub_integral
+                sub_integral = self._integrate_subinterval(F_sub, A_sub, verbose=True)
+                result += sub_integral
 
-            if self.verbose:
                 print("  " + "-"*50)
                 print(f"    {sub_integral}\n")
-        
-        if self.verbose:
-            print("Total:", result)
-        
+
+        print("Total:", result)
+
         return result
     
     def annotate_plot(self):
@@ -131,7 +198,7 @@ class CompoundQuadrature(object):
 
         # plotting given points
         if not self.f is None:
-            Y_actual = [self.f(x) for x in X]
+            Y_actual = self._evaluate(X)
             plt.plot(X, Y_actual, color='orange', alpha=1.0, label="f(x)")
 
         plt.plot(self.X, self.F, color='k', marker='o', linestyle='None', markersize=5, label="given points")
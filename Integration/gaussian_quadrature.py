@@ -1,25 +1,29 @@
 import numpy as np
 import sympy as sym
 import matplotlib.pyplot as plt
-from scipy.special.orthogonal import p_roots
 
+import gaussian_rules
 from compound_quadrature import CompoundQuadrature
 
 class GaussianQuadrature(CompoundQuadrature):
 
     name = "Gaussian Quadrature"
 
+    rules = ("legendre", "lobatto", "laguerre", "hermite")
+
     def __init__(self, D, f, var="x", verbose=False):
         self.a, self.b = D
-        self.f = f
 
         if self.a >= self.b:
-            raise ValueError(f"a ({a}) must be strictly less than b ({b})")
+            raise ValueError(f"a ({self.a}) must be strictly less than b ({self.b})")
+        if not callable(f):
+            raise TypeError("f must be a function.")
 
-        # these are temporary values just to allow for the inheritance to work
+        # these are temporary values just to allow for the inheritance to work (f isn't evaluated, the ends might be infinite)
         X_known = [self.a, self.b]
-        F_known = f
+        F_known = [np.nan, np.nan]
         super(GaussianQuadrature, self).__init__(X_known, F_known, var=var, verbose=verbose)
+        self.f = f
 
     @staticmethod
     def change_of_variables(a, b):
@@ -27,43 +31,91 @@ class GaussianQuadrature(CompoundQuadrature):
         shift = (a+b)/2
         return scale, shift
 
-    def integrate(self, n, m=None):
-        # for simplicity, I'm not going to implement subitervals
-        # I'm pretty sure with Guassian Quadrature it doesn't make sense to
-        # and you will get a better approximation using the full function
-        """
-        if m is None:
-            m = self.N
+    def _default_rule(self):
+        if np.isfinite(self.a) and np.isfinite(self.b):
+            return "legendre"
+        if np.isfinite(self.a) or np.isfinite(self.b):
+            return "laguerre"
+        return "hermite"
 
-        subintervals = self._get_subintervals(m)
+    def _nodes_and_weights(self, n, panels, rule):
         """
-
-        # I couldn't figure out how to calculate the quadrature weights manually
-        # so we cheat and use scipy
-        [X, A] = p_roots(n)
+        the nodes and weights for f on D (not the weight function of the rule)
+            legendre/lobatto: (-1, 1) is mapped onto each of the panels of (a, b)
+            laguerre: [0, inf) is shifted onto [a, inf) (or reflected onto (-inf, b]) and the weight e^(-x) is divided out
+            hermite:  the weight e^(-x^2) is divided out
+        """
+        X, A = gaussian_rules.nodes_and_weights(rule, n)
+
+        if rule in ("legendre", "lobatto"):
+            if not (np.isfinite(self.a) and np.isfinite(self.b)):
+                raise ValueError(f"The {rule} rule needs a finite interval. Currently ({self.a}, {self.b})")
+
+            # the same reference rule on every panel, all at once
+            edges = np.linspace(self.a, self.b, panels+1)
+            scale, shift = self.change_of_variables(edges[:-1], edges[1:])
+            X = shift[:, None] + scale[:, None] * X
+            A = scale[:, None] * A
+
+            # neighbouring Lobatto panels share their ends, the weights of those are added together
+            if rule == "lobatto":
+                index = (np.arange(panels) * (n-1))[:, None] + np.arange(n)
+                X_shared = np.empty(panels*(n-1) + 1)
+                X_shared[index] = X
+                return X_shared, np.bincount(index.ravel(), weights=A.ravel())
+            return X.ravel(), A.ravel()
+
+        if panels != 1:
+            raise ValueError(f"Panels are only supported for finite intervals. Currently {panels}")
+
+        # the weights with e^(-x) or e^(-x^2) divided out, since we're integrating f and not f * e^(-x)
+        X, A = gaussian_rules.nodes_and_weights(rule, n, scaled=True)
+
+        if rule == "laguerre":
+            if np.isfinite(self.a) and self.b == np.inf:
+                return self.a + X, A
+            if self.a == -np.inf and np.isfinite(self.b):
+                return (self.b - X)[::-1], A[::-1]
+            raise ValueError(f"The laguerre rule needs a semi-infinite interval. Currently ({self.a}, {self.b})")
+
+        if not (self.a == -np.inf and self.b == np.inf):
+            raise ValueError(f"The hermite rule needs the whole real line. Currently ({self.a}, {self.b})")
+        return X, A
+
+    def integrate(self, n, panels=1, rule=None):
+        """
+        n-point Gaussian quadrature of f on D
+            panels > 1 splits (a, b) into equal panels with n points each (composite Gaussian quadrature),
+            f is still evaluated at the nodes of all the panels in a single call
+            rule defaults to legendre on finite intervals, laguerre on semi-infinite ones and hermite on the whole real line
+        the nodes and weights of each rule are only computed once (see gaussian_rules.py)
+        """
+        if rule is None:
+            rule = self._default_rule()
+        if not rule in self.rules:
+            raise ValueError(f"rule must be one of {self.rules}. Currently {rule}")
+        if panels < 1:
+            raise ValueError(f"panels must be at least 1. Currently {panels}")
 
         if self.verbose:
+            X, A = gaussian_rules.nodes_and_weights(rule, n)
             print("X:", X)
             print("A:", A)
             print()
-        
-        # The above assume (a, b) = (-1, 1)
-        # we do a change of variables to convert them to any interval
-        scale, shift = self.change_of_variables(self.a, self.b)
-        X = [shift + scale * x for x in X]
-        A = [scale * Ai for Ai in A]
+
+        # The above are for the reference interval of the rule
+        # we do a change of variables to convert them to D
+        X, A = self._nodes_and_weights(n, panels, rule)
 
         if self.verbose:
             print("CoV X:", X)
             print("CoV A:", A)
             print()
 
-        # I add these only so the printing looks better
-        #X = [self.a] + X + [self.b]
-        #A = [0] + A + [0]
-
-        # reinitializing everything so our functions work
-        super(GaussianQuadrature, self).__init__(X, self.f, var=str(self.var), verbose=self.verbose)
+        # replacing the temporary values, f is evaluated at every node at once
+        self.X = X
+        self.F = self._evaluate(X)
+        self.N = len(X)
 
         # calling our generic quadrature integration approximation
         return super(GaussianQuadrature, self).integrate(A=A)
@@ -101,4 +153,15 @@ if __name__ == "__main__":
     integrator = GaussianQuadrature((2.0, 2.5), f, verbose=True)
     integrator.integrate(n)
 
+    # composite: 1000 panels with 5 points each, f is evaluated at all 5000 nodes in one call
+    integrator = GaussianQuadrature((0, 10), f)
+    print()
+    print("composite:", integrator.integrate(n, panels=1000), "exact:", np.exp(10) - 1)
+
+    # semi-infinite and infinite domains
+    integrator = GaussianQuadrature((0, np.inf), lambda x: x**3 * np.exp(-x))
+    print("laguerre: ", integrator.integrate(n), "exact:", 6)
+    integrator = GaussianQuadrature((-np.inf, np.inf), lambda x: np.exp(-x**2) * np.cos(x))
+    print("hermite:  ", integrator.integrate(20), "exact:", np.sqrt(np.pi) * np.exp(-1/4))
+
     #integrator.plot()
\ No newline at end of file
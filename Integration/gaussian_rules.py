@@ -0,0 +1,188 @@
+import numpy as np
+
+# the nodes and weights of every rule, keyed by (rule, n), so they're only ever computed once per process
+_cache = {}
+
+
+def _golub_welsch(diagonal, off_diagonal, mu0):
+    """
+    nodes and weights of the Gaussian rule whose orthogonal polynomials satisfy the three-term recurrence with the given coefficients
+        the nodes are the eigenvalues of the symmetric tridiagonal Jacobi matrix J
+        the weights are mu0 * (first component of the normalized eigenvectors)^2, where mu0 is the integral of the weight function
+    """
+    J = np.diag(diagonal) + np.diag(off_diagonal, 1) + np.diag(off_diagonal, -1)
+    X, V = np.linalg.eigh(J)
+    return X, mu0 * V[0]**2
+
+
+def _legendre(n, X):
+    """
+    the Legendre polynomials P_n and P_{n-1} at X, from (k+1) P_{k+1} = (2k+1) x P_k - k P_{k-1}
+    """
+    P, P_prev = np.ones_like(X), np.zeros_like(X)
+    for k in range(n):
+        P, P_prev = ((2*k + 1) * X * P - k * P_prev) / (k + 1), P
+    return P, P_prev
+
+
+def legendre(n):
+    """
+    Gauss-Legendre on [-1, 1] with weight 1, exact for polynomials of degree <= 2n - 1
+    """
+    if ("legendre", n) in _cache:
+        return _cache[("legendre", n)][:2]
+
+    k = np.arange(1, n)
+    X, _ = _golub_welsch(np.zeros(n), k / np.sqrt(4*k**2 - 1), 2)
+
+    # a couple of Newton steps on P_n polish the eigenvalues, and the weights are more accurate from P_n' than from the eigenvectors
+    for _ in range(2):
+        P, P_prev = _legendre(n, X)
+        dP = n * (X*P - P_prev) / (X**2 - 1)
+        X = X - P / dP
+    P, P_prev = _legendre(n, X)
+    dP = n * (X*P - P_prev) / (X**2 - 1)
+    A = 2 / ((1 - X**2) * dP**2)
+
+    return _store("legendre", n, X, A)
+
+
+def lobatto(n):
+    """
+    Gauss-Lobatto on [-1, 1] with weight 1, including both ends, exact for polynomials of degree <= 2n - 3
+        the interior nodes are the roots of P_{n-1}', which are Gauss-Jacobi nodes for the weight (1 - x^2)
+        the weights are 2 / (n (n-1) P_{n-1}(x)^2)
+    """
+    if n < 2:
+        raise ValueError(f"Gauss-Lobatto needs at least 2 points. Currently {n}")
+    if ("lobatto", n) in _cache:
+        return _cache[("lobatto", n)][:2]
+
+    X_interior = np.zeros(0)
+    if n > 2:
+        k = np.arange(1, n-2)
+        X_interior, _ = _golub_welsch(np.zeros(n-2), np.sqrt(k*(k + 2) / ((2*k + 1)*(2*k + 3))), 4/3)
+
+    # symmetric like Gauss-Hermite below
+    X = np.concatenate(([-1.0], X_interior, [1.0]))
+    X = (X - X[::-1]) / 2
+
+    P, _ = _legendre(n-1, X)
+    A = 2 / (n*(n - 1) * P**2)
+
+    return _store("lobatto", n, X, A)
+
+
+def _christoffel(X, diagonal, off_diagonal, mu0):
+    """
+    log of the weights A_i = 1 / sum_k p_k(x_i)^2, with p_k the orthonormal polynomials of the recurrence
+        unlike the eigenvectors, this is accurate relative to the size of A_i, even for the tiny weights far out in the tails
+        the p_k grow very quickly there, so the sum is rescaled whenever they get large
+    """
+    P_prev, P = np.zeros_like(X), np.full_like(X, 1 / np.sqrt(mu0))
+    total, log_scale = P**2, np.zeros_like(X)
+    for k in range(len(X) - 1):
+        P_next = ((X - diagonal[k]) * P - (off_diagonal[k-1] * P_prev if k > 0 else 0)) / off_diagonal[k]
+        P_prev, P = P, P_next
+
+        large = np.abs(P) > 1e100
+        P[large] /= 1e100
+        P_prev[large] /= 1e100
+        total[large] /= 1e200
+        log_scale[large] += 200 * np.log(10)
+
+        total += P**2
+    return -(np.log(total) + log_scale)
+
+
+def laguerre(n):
+    """
+    Gauss-Laguerre on [0, inf) with weight e^(-x)
+    """
+    if ("laguerre", n) not in _cache:
+        k = np.arange(1, n)
+        diagonal, off_diagonal = 2*np.arange(n) + 1.0, k.astype(float)
+        X, _ = _golub_welsch(diagonal, off_diagonal, 1)
+
+        log_A = _christoffel(X, diagonal, off_diagonal, 1)
+        _store("laguerre", n, X, np.exp(log_A), np.exp(log_A + X))
+
+    return _cache[("laguerre", n)][:2]
+
+
+def hermite(n):
+    """
+    Gauss-Hermite on (-inf, inf) with weight e^(-x^2)
+    """
+    if ("hermite", n) not in _cache:
+        k = np.arange(1, n)
+        diagonal, off_diagonal = np.zeros(n), np.sqrt(k / 2)
+        X, _ = _golub_welsch(diagonal, off_diagonal, np.sqrt(np.pi))
+
+        # the rule is symmetric, which the eigenvalues only are up to roundoff
+        X = (X - X[::-1]) / 2
+
+        log_A = _christoffel(X, diagonal, off_diagonal, np.sqrt(np.pi))
+        log_A = (log_A + log_A[::-1]) / 2
+        _store("hermite", n, X, np.exp(log_A), np.exp(log_A + X**2))
+
+    return _cache[("hermite", n)][:2]
+
+
+def _store(rule, n, X, A, A_scaled=None):
+    """
+    A_scaled are the weights with the weight function divided out, A_i / w(x_i), for integrating f itself instead of f * w
+    """
+    if A_scaled is None:
+        A_scaled = A
+    for array in (X, A, A_scaled):
+        array.setflags(write=False)
+    _cache[(rule, n)] = (X, A, A_scaled)
+    return X, A
+
+
+rules = {
+    "legendre": legendre,
+    "lobatto": lobatto,
+    "laguerre": laguerre,
+    "hermite": hermite,
+}
+
+
+def nodes_and_weights(rule, n, scaled=False):
+    """
+    the nodes and weights of the n-point rule
+        scaled=True divides the weight function out of the weights, so that sum_i A_i f(x_i) approximates the integral of f itself
+        (computed in logs, so the far out nodes get a tiny weight instead of 0 * inf)
+    """
+    if rule not in rules:
+        raise ValueError(f"rule must be one of {list(rules.keys())}. Currently {rule}")
+    if n < 1:
+        raise ValueError(f"n must be at least 1. Currently {n}")
+    X, A = rules[rule](n)
+    return (X, _cache[(rule, n)][2]) if scaled else (X, A)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+if __name__ == "__main__":
+
+    for rule in rules:
+        X, A = nodes_and_weights(rule, 5)
+        print(f"{rule}:")
+        print("    X:", X)
+        print("    A:", A)
+
+    # exact up to degree 2n - 1 (2n - 3 for Lobatto)
+    print()
+    n = 10
+    X, A = legendre(n)
+    print("legendre, integral of x^18 on [-1, 1]:", A @ X**18, "exact:", 2/19)
+    X, A = lobatto(n)
+    print("lobatto,  integral of x^16 on [-1, 1]:", A @ X**16, "exact:", 2/17)
+    X, A = laguerre(n)
+    print("laguerre, integral of x^5 e^(-x) on [0, inf):", A @ X**5, "exact:", 120)
+    X, A = hermite(n)
+    print("hermite,  integral of x^4 e^(-x^2) on (-inf, inf):", A @ X**4, "exact:", 3*np.sqrt(np.pi)/4)
@@ -1,8 +1,10 @@
+import numpy as np
 import sympy as sym
 import matplotlib.pyplot as plt
 from matplotlib.patches import Polygon
 
 from compound_quadrature import CompoundQuadrature
+import quadrature_weights
 
 class LagrangeInterpolation(CompoundQuadrature):
 
@@ -43,8 +45,14 @@ class LagrangeInterpolation(CompoundQuadrature):
         if self.verbose:
             self._separator()
         
-        subintervals = self._get_subintervals(m)
-        A = [ [self.A_LI(I, i) for i in I] for I in subintervals ]
+        # the symbolic integrals are only worth their cost when we want to print them,
+        # otherwise the weights come (cached) from the moment equations, scaled to each subinterval
+        if self.verbose:
+            subintervals = self._get_subintervals(m)
+            A = [ [self.A_LI(I, i) for i in I] for I in subintervals ]
+        else:
+            X = np.asarray(self.X, dtype=float)
+            A = [ quadrature_weights.weights(X[block]) for block in self._subinterval_blocks(m) ]
         
         if self.verbose:
             print(f"A = {A}")
@@ -15,10 +15,10 @@ class NewtonCotes(LagrangeInterpolation):
 
         # checking for evenly spaced intervals
         if len(X_known) > 1:
+            # up to roundoff, so np.linspace grids count as evenly spaced
             dx = X_known[1] - X_known[0]
-            for i in range(len(X_known)-1):
-                if X_known[i+1] - X_known[i] != dx:
-                    raise ValueError("X_known must be an evenly-spaced interval.")
+            if not np.allclose(np.diff(X_known), dx, rtol=1e-9, atol=0):
+                raise ValueError("X_known must be an evenly-spaced interval.")
 
         super(NewtonCotes, self).__init__(X_known, F_known, var=var, verbose=verbose)
 
@@ -32,12 +32,13 @@ class NewtonCotes(LagrangeInterpolation):
             if self.f is None:
                 raise ValueError("We require the function in order to do the interpolation")
 
-            X_sub = [self.X[0]]
-            for i in range(len(self.X)-1):
-                X_sub.extend( list(np.linspace(self.X[i], self.X[i+1], m))[1:] )
-            
-            self.X = X_sub
-            self.F = [self.f(x) for x in self.X]
+            # m evenly spaced points between every pair in X, sharing their ends
+            X = np.asarray(self.X, dtype=float)
+            steps = np.linspace(0, 1, m)[1:]
+            X_sub = X[:-1, None] + (X[1:] - X[:-1])[:, None] * steps
+
+            self.X = np.concatenate(([X[0]], X_sub.ravel()))
+            self.F = self._evaluate(self.X)
             self.N = len(self.X)
         
         return super(NewtonCotes, self).integrate(m=m)
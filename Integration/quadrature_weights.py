@@ -0,0 +1,91 @@
+import numpy as np
+
+# the closed Newton-Cotes weights on [0, 1] for m equally spaced points, exact so they don't go through the solve below
+NEWTON_COTES = {
+    2: np.array([1, 1]) / 2,                        # Trapezoidal Rule
+    3: np.array([1, 4, 1]) / 6,                     # Simpson's Rule
+    4: np.array([1, 3, 3, 1]) / 8,                  # Simpson's 3/8 Rule
+    5: np.array([7, 32, 12, 32, 7]) / 90,           # Boole's Rule
+    6: np.array([19, 75, 50, 50, 75, 19]) / 288,
+    7: np.array([41, 216, 27, 272, 27, 216, 41]) / 840,
+}
+
+# reference weights, keyed by the number of nodes and their relative positions in the subinterval
+_cache = {}
+
+
+def _pattern(X):
+    """
+    the nodes X mapped affinely onto [0, 1], rounded so that the same pattern always gives the same key
+    """
+    X = np.asarray(X, dtype=float)
+    t = (X - X[0]) / (X[-1] - X[0])
+    return tuple(np.round(t, 12))
+
+
+def reference_weights(t):
+    """
+    weights w of the interpolatory rule with nodes t on [0, 1], i.e. the integrals of the Lagrange polynomials L_i
+        every polynomial of degree < m is integrated exactly, which for the monomials means
+            sum_i w_i * t_i^k = 1 / (k+1),    k = 0, ..., m-1
+        so w solves a Vandermonde system (the moment equations)
+    the same nodes are only ever solved for once
+    """
+    t = tuple(t)
+    if t in _cache:
+        return _cache[t]
+
+    m = len(t)
+    if m in NEWTON_COTES and np.allclose(t, np.linspace(0, 1, m)):
+        w = NEWTON_COTES[m]
+    else:
+        # centered on [-1, 1] the Vandermonde matrix is much better conditioned, the moments there are (1 - (-1)^(k+1)) / (k+1)
+        s = 2 * np.asarray(t) - 1
+        k = np.arange(m)
+        V = s[None, :] ** k[:, None]
+        moments = (1 - (-1.0)**(k+1)) / (k+1)
+        w = np.linalg.solve(V, moments) / 2
+
+    w.setflags(write=False)
+    _cache[t] = w
+    return w
+
+
+def weights(X):
+    """
+    the interpolatory quadrature weights for the nodes X (the integrals of their Lagrange polynomials from X[0] to X[-1])
+        the reference weights scaled by the length of the subinterval
+    X can also be a 2-D array with the nodes of one subinterval per row, then the rows with the same pattern share their weights
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        return (X[-1] - X[0]) * reference_weights(_pattern(X))
+    if len(X) == 0:
+        return np.zeros(X.shape)
+
+    T = np.round((X - X[:, :1]) / (X[:, -1:] - X[:, :1]), 12)
+    if np.allclose(T, T[0], rtol=0, atol=1e-9):
+        # the usual case (e.g. an equally spaced grid), no need to sort the rows
+        return (X[:, -1] - X[:, 0])[:, None] * reference_weights(tuple(T[0]))
+    patterns, inverse = np.unique(T, axis=0, return_inverse=True)
+    W = np.array([reference_weights(tuple(t)) for t in patterns])
+    return (X[:, -1] - X[:, 0])[:, None] * W[inverse.ravel()]
+
+
+def clear_cache():
+    _cache.clear()
+
+
+if __name__ == "__main__":
+
+    for m in range(2, 6):
+        X = np.linspace(2, 3, m)
+        print(f"m = {m}:", weights(X))
+
+    # not equally spaced
+    X = [-1, -0.4, 0, 0.2, 1]
+    A = weights(X)
+    print()
+    print("X =", X)
+    print("A =", A)
+    print("integral of exp(x) ~", A @ np.exp(X), "exact:", np.exp(1) - np.exp(-1))
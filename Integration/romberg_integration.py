@@ -0,0 +1,105 @@
+import numpy as np
+
+from trapezoidal_rule import TrapezoidalRule
+
+class RombergIntegration(TrapezoidalRule):
+
+    name = "Romberg Integration"
+
+    def __init__(self, D, f, var="x", verbose=False):
+        self.a, self.b = D
+
+        if self.a >= self.b:
+            raise ValueError(f"a ({self.a}) must be strictly less than b ({self.b})")
+        if not callable(f):
+            raise TypeError("f must be a function.")
+
+        # the trapezoidal rule with a single subinterval is the first level of the table
+        super(RombergIntegration, self).__init__([self.a, self.b], f, var=var, verbose=verbose)
+
+        # f at the ends was just evaluated, integrate reuses it (self.F is overwritten by integrate)
+        self._F_ends = np.asarray(self.F, dtype=float)
+
+    def integrate(self, atol=1e-10, rtol=1e-10, max_levels=20):
+        """
+        Romberg integration: the trapezoidal rule with the step halved at every level, extrapolated with Richardson's table
+            T_k = T_{k-1} / 2 + h_k * (sum of f at the 2^(k-1) new midpoints),    h_k = (b - a) / 2^k
+            R[k][j] = R[k][j-1] + (R[k][j-1] - R[k-1][j-1]) / (4^j - 1)
+        only the new midpoints are evaluated at each level, all of them in one call to f
+        stops once successive diagonal entries R[k-1][k-1], R[k][k] agree to max(atol, rtol * |R[k][k]|)
+        """
+        if max_levels < 1:
+            raise ValueError(f"max_levels must be at least 1. Currently {max_levels}")
+
+        # starting from the ends only, in case integrate was already called
+        X = np.array([self.a, self.b], dtype=float)
+        F = self._F_ends.copy()
+        self.evaluations = 2
+
+        h = self.b - self.a
+        table = [ [h/2 * (F[0] + F[1])] ]
+
+        if self.verbose:
+            self._separator()
+            print(f"R[0]: {[float(R) for R in table[0]]}")
+
+        self.converged = False
+        for k in range(1, max_levels+1):
+            h /= 2
+
+            # the new midpoints, interleaved with the old points
+            X_mid = (X[:-1] + X[1:]) / 2
+            F_mid = self._evaluate(X_mid)
+            self.evaluations += len(X_mid)
+
+            X_next, F_next = np.empty(2*len(X) - 1), np.empty(2*len(X) - 1)
+            X_next[0::2], X_next[1::2] = X, X_mid
+            F_next[0::2], F_next[1::2] = F, F_mid
+            X, F = X_next, F_next
+
+            row = [table[-1][0]/2 + h * np.sum(F_mid)]
+            for j in range(1, k+1):
+                row.append( row[j-1] + (row[j-1] - table[-1][j-1]) / (4**j - 1) )
+            table.append(row)
+
+            if self.verbose:
+                print(f"R[{k}]: {[float(R) for R in row]}")
+
+            # the first two levels can agree by accident (e.g. f vanishing at every node so far)
+            if k >= 2 and abs(row[-1] - table[-2][-1]) <= max(atol, rtol * abs(row[-1])):
+                self.converged = True
+                break
+        else:
+            print(f"Warning: Romberg integration did not converge in {max_levels} levels, the last two diagonal entries differ by {abs(table[-1][-1] - table[-2][-1])}")
+
+        # storing values for later (plotting shows the finest trapezoidal rule)
+        self.X, self.F = X, F
+        self.N = len(X)
+        self.m = 2
+        self.table = table
+
+        if self.verbose:
+            print()
+            print(f"{len(table)} levels, {self.evaluations} evaluations of f")
+            print("Total:", table[-1][-1])
+
+        return table[-1][-1]
+
+
+if __name__ == "__main__":
+
+    def f(x):
+        return np.sin(1 - x/10)
+
+    exact = 10 * (np.cos(0) - np.cos(1))
+
+    integrator = RombergIntegration((0, 10), f, verbose=True)
+    result = integrator.integrate(atol=1e-14, rtol=1e-14)
+    print(f"error {abs(result - exact):.2e}")
+    print()
+
+    # the first column is the plain trapezoidal rule on the same points
+    for k, row in enumerate(integrator.table):
+        print(f"{2**k + 1:>4} points: trapezoidal error {abs(row[0] - exact):.2e}, Romberg error {abs(row[-1] - exact):.2e}")
+
+    integrator.plot()
@@ -2,6 +2,8 @@ import numpy as np
 import sympy as sym
 
 from interpolator import Interpolator
+from Linear_Systems.sparse_matrix import CSRMatrix
+from Linear_Systems.tridiagonal_solver import TridiagonalSolver
 
 class NaturalCubicSpline(Interpolator):
 
@@ -47,24 +49,25 @@ class NaturalCubicSpline(Interpolator):
         v = np.array([ 2*(dX[i] + dX[i+1]) for i in range(self.N-2) ])
         q = dF / dX
         u = np.array([ 3*(q[i+1] - q[i]) for i in range(self.N-2) ])
-        T = np.zeros((self.N-2, self.N-2))
 
         # compute triangular system
-        if self.N == 3:
-            # This is another special case because T is 1x1
-            T[0, 0] = v[0]
-        else:
-            T[0, 0], T[0, 1] = v[0], dX[1]
-            for j in range(1, self.N-3):
-                T[j, j-1] = dX[j]
-                T[j, j]   = v[j]
-                T[j, j+1] = dX[j+1]
-            T[-1, -2], T[-1, -1] = dX[-2], v[-1]
-
-        # solve T @ z = u for z
-        c = np.linalg.solve(T, u)
+        #   T only has the three diagonals (dX[1:-1], v, dX[1:-1]), so we never store it
+        #   (when N = 3, T is 1x1 and the off-diagonals are empty)
+        sub = np.concatenate(([0], dX[1:-1]))
+        sup = np.concatenate((dX[1:-1], [0]))
+
+        # solve T @ z = u for z in O(N) with the Thomas algorithm
+        c = TridiagonalSolver.thomas(sub, v, sup, u)
 
         if self.verbose:
+            K = self.N-2
+            idx = np.arange(K)
+            T = CSRMatrix.from_coo(
+                    np.concatenate((idx, idx[1:], idx[:-1])),
+                    np.concatenate((idx, idx[:-1], idx[1:])),
+                    np.concatenate((v, dX[1:-1], dX[1:-1])),
+                    (K, K)
+                )
             print("T = ")
             print(T)
             print()
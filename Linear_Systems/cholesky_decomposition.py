@@ -0,0 +1,352 @@
+import numpy as np
+
+from .linear_system_solver import LinearSystemSolver
+from .sparse_matrix import CSRMatrix, is_sparse
+
+
+class CholeskyFactorization(object):
+    """
+    A reusable A = L @ L.T factorization of a symmetric positive definite A
+        factor once with CholeskyDecomposition.factor(A), then call .solve(b) for as many b as you like
+    L is a numpy array, or a CSRMatrix when A was factored in band storage
+    """
+
+    def __init__(self, L):
+        self.L = L
+        self.n = L.shape[0]
+
+    def _check(self, b):
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.n:
+            raise ValueError(f"b must have {self.n} rows. Currently {b.shape[0]}")
+        return b
+
+    def solve(self, b):
+        """
+        solving A @ x = b for x
+        where b is either a vector of length n or an (n, k) block of right-hand sides
+        """
+        y = LinearSystemSolver.forward_substitution(self.L, self._check(b))
+        return LinearSystemSolver.backward_substitution(self.L.T, y)
+
+    # A is symmetric
+    def solve_transpose(self, b):
+        return self.solve(b)
+
+
+class LDLFactorization(CholeskyFactorization):
+    """
+    A reusable A = L @ D @ L.T factorization of a symmetric A
+        L is unit lower triangular and D = diag(d), there are no square roots so A doesn't have to be positive definite
+    """
+
+    def __init__(self, L, d):
+        super(LDLFactorization, self).__init__(L)
+        self.d = d
+
+    @property
+    def D(self):
+        return np.diag(self.d)
+
+    def solve(self, b):
+        y = LinearSystemSolver.forward_substitution(self.L, self._check(b))
+        y = (y.T / self.d).T
+        return LinearSystemSolver.backward_substitution(self.L.T, y)
+
+
+class TridiagonalLDLFactorization(LDLFactorization):
+    """
+    A = L @ D @ L.T for a symmetric tridiagonal A, where L is unit lower bidiagonal with sub diagonal l
+        2n numbers instead of the n^2 of a dense factorization, and O(n) to factor and to solve
+    (the Cholesky factor is L @ sqrt(D), which we never need to form)
+    """
+
+    def __init__(self, l, d):
+        self.l = l
+        self.d = d
+        self.n = len(d)
+
+    @property
+    def L(self):
+        n = self.n
+        rows = np.concatenate((np.arange(n), np.arange(1, n)))
+        cols = np.concatenate((np.arange(n), np.arange(n-1)))
+        return CSRMatrix.from_coo(rows, cols, np.concatenate((np.ones(n), self.l)), (n, n))
+
+    def solve(self, b):
+        b = self._check(b)
+        n = self.n
+
+        # a single right-hand side is faster with plain python floats
+        if b.ndim == 1:
+            l, d, x = self.l.tolist(), self.d.tolist(), b.tolist()
+            for i in range(1, n):
+                x[i] -= l[i-1] * x[i-1]
+            x[-1] /= d[-1]
+            for i in reversed(range(n-1)):
+                x[i] = x[i] / d[i] - l[i] * x[i+1]
+            return np.array(x)
+
+        x = b.copy()
+        for i in range(1, n):
+            x[i] -= self.l[i-1] * x[i-1]
+        x[-1] /= self.d[-1]
+        for i in reversed(range(n-1)):
+            x[i] = x[i] / self.d[i] - self.l[i] * x[i+1]
+        return x
+
+
+class TridiagonalCholeskyFactorization(TridiagonalLDLFactorization):
+    """
+    A = L @ L.T for a symmetric positive definite tridiagonal A
+        stored as the same l and d as TridiagonalLDLFactorization, so solving needs no square roots
+        L = L_unit @ sqrt(D) is only formed when you ask for it
+    """
+
+    @property
+    def L(self):
+        n = self.n
+        root = np.sqrt(self.d)
+        rows = np.concatenate((np.arange(n), np.arange(1, n)))
+        cols = np.concatenate((np.arange(n), np.arange(n-1)))
+        return CSRMatrix.from_coo(rows, cols, np.concatenate((root, self.l * root[:-1])), (n, n))
+
+
+class SymmetricDecomposition(LinearSystemSolver):
+    """
+    Base for the factorizations of a symmetric A, which only ever read its lower triangle
+        a wide A is factored densely
+        a banded A (half-bandwidth h) is factored in band storage, which costs O(n h^2) instead of O(n^3)
+        a tridiagonal A goes through an O(n) recurrence
+    check_symmetry = False skips the O(nnz) symmetry check when you already know A is symmetric
+    """
+
+    def __init__(self, verbose=False, check_symmetry=True):
+        super(SymmetricDecomposition, self).__init__(verbose=verbose)
+        self.check_symmetry = check_symmetry
+
+    def __call__(self, A, b):
+        return self.solve(A=A, b=b)
+
+    def factor(self, A):
+        """
+        Returns a factorization of A which can be reused for any number of right-hand sides
+        """
+        if not is_sparse(A):
+            A = np.array(A, dtype=float)
+        m, n = A.shape
+        if m != n:
+            raise ValueError("A must be a square matrix.")
+        if self.check_symmetry and not self.is_symmetric(A):
+            raise ValueError("A must be symmetric.")
+
+        S = A if is_sparse(A) else CSRMatrix.from_dense(A)
+        h = max(S.bandwidth())
+
+        if h <= 1:
+            # the sub diagonal and the diagonal, padded so every row has both
+            l = np.zeros(n)
+            below = S.indices == S.row_indices - 1
+            l[S.indices[below]] = S.data[below]
+            return self._factor_tridiagonal(l[:-1], S.diagonal())
+
+        # like LUDecomposition, a wide band is no better than dense storage
+        if 2*h + 1 >= n:
+            return self._factor_dense(A.toarray() if is_sparse(A) else A)
+        return self._factor_banded(S, h)
+
+    @staticmethod
+    def _band_windows(A, h):
+        """
+        band storage of the lower triangle: S[i, c - i + h] = A[i, c], padded with zero rows so the last windows stay in bounds
+            windows[j][a, b] is A[j+a, j+b], so windows[j] is the (h+1) x (h+1) block column j touches
+            (only its lower triangle b <= a is meaningful, the rest aliases other entries of S)
+        """
+        n = A.shape[0]
+        width = h + 1
+        lower = A.indices <= A.row_indices
+
+        S = np.zeros((n + h + 1, width))
+        S[A.row_indices[lower], A.indices[lower] - A.row_indices[lower] + h] = A.data[lower]
+
+        flat = S.ravel()
+        itemsize = flat.itemsize
+        windows = np.lib.stride_tricks.as_strided(flat[h:], shape=(n, h + 1, h + 1),
+                                                  strides=(width * itemsize, h * itemsize, itemsize))
+        return S, windows
+
+    @staticmethod
+    def _band_to_csr(S, n, h):
+        rows = np.repeat(np.arange(n), h + 1)
+        cols = rows + np.tile(np.arange(h + 1), n) - h
+        inside = cols >= 0
+        return CSRMatrix.from_coo(rows[inside], cols[inside], S[:n].ravel()[inside], (n, n))
+
+    def _factor_dense(self, A):
+        raise NotImplementedError("_factor_dense() function not yet implemented.")
+
+    def _factor_banded(self, A, h):
+        raise NotImplementedError("_factor_banded() function not yet implemented.")
+
+    def _factor_tridiagonal(self, l, d):
+        """
+        A = L @ D @ L.T for the symmetric tridiagonal A with sub diagonal l and diagonal d
+            d_0 = A[0, 0],    l_i = A[i+1, i] / d_i,    d_(i+1) = A[i+1, i+1] - l_i * A[i+1, i]
+        """
+        a, b = l.tolist(), d.tolist()
+        l, d = [0.0] * len(a), [0.0] * len(b)
+        d[0] = b[0]
+        for i in range(len(a)):
+            if d[i] == 0:
+                raise ValueError("A zero pivot appeared, A needs a pivoted factorization (e.g. LUDecomposition).")
+            l[i] = a[i] / d[i]
+            d[i+1] = b[i+1] - l[i] * a[i]
+        if d[-1] == 0:
+            raise ValueError("A zero pivot appeared, A needs a pivoted factorization (e.g. LUDecomposition).")
+        return TridiagonalLDLFactorization(np.array(l), np.array(d))
+
+    def solve(self, A, b):
+        factorization = self.factor(A)
+        # a sparse A can be far too big to print, a dense one is displayed whichever path factored it
+        if self.verbose and not is_sparse(A):
+            self._display_factorization(factorization)
+        return factorization.solve(b)
+
+    @staticmethod
+    def _dense(M):
+        return M.toarray() if is_sparse(M) else M
+
+    def _display_factorization(self, factorization):
+        raise NotImplementedError("_display_factorization() function not yet implemented.")
+
+
+class CholeskyDecomposition(SymmetricDecomposition):
+    """
+    A = L @ L.T for symmetric positive definite A (e.g. -ClassicalRelaxation.B(M, (1, -2, 1)))
+        half the work and storage of LU, and never needs a pivot
+    """
+
+    def _factor_dense(self, A):
+        """
+        one column of L at a time (left-looking)
+            L[j, j] = sqrt(A[j, j] - L[j, :j] @ L[j, :j])
+            L[i, j] = (A[i, j] - L[i, :j] @ L[j, :j]) / L[j, j]     for i > j
+        which takes n^3 / 6 multiply-adds, half of LU's
+        """
+        n = A.shape[0]
+        L = np.zeros((n, n))
+        for j in range(n):
+            d = A[j, j] - L[j, :j] @ L[j, :j]
+            if d <= 0:
+                raise ValueError("A must be symmetric positive definite.")
+            L[j, j] = np.sqrt(d)
+            L[j+1:, j] = (A[j+1:, j] - L[j+1:, :j] @ L[j, :j]) / L[j, j]
+        return CholeskyFactorization(L)
+
+    def _factor_banded(self, A, h):
+        n = A.shape[0]
+        S, windows = self._band_windows(A, h)
+
+        for j in range(n):                  # iterating over columns
+            block = windows[j]
+            if block[0, 0] <= 0:
+                raise ValueError("A must be symmetric positive definite.")
+
+            # column j of L, then a symmetric rank-1 update of the lower triangle of the rest of the window
+            block[0, 0] = np.sqrt(block[0, 0])
+            block[1:, 0] /= block[0, 0]
+            block[1:, 1:] -= np.tril(np.outer(block[1:, 0], block[1:, 0]))
+
+        return CholeskyFactorization(self._band_to_csr(S, n, h))
+
+    def _factor_tridiagonal(self, l, d):
+        factorization = super(CholeskyDecomposition, self)._factor_tridiagonal(l, d)
+        if np.any(factorization.d <= 0):
+            raise ValueError("A must be symmetric positive definite.")
+        return TridiagonalCholeskyFactorization(factorization.l, factorization.d)
+
+    def _display_factorization(self, factorization):
+        L = self._dense(factorization.L)
+        print("L:")
+        self._display_matrix_update(L, L.T)
+        print()
+
+
+class LDLDecomposition(SymmetricDecomposition):
+    """
+    A = L @ D @ L.T for symmetric A, with L unit lower triangular and D diagonal
+        no square roots, so it also works when A is negative definite (e.g. ClassicalRelaxation.B(M, (1, -2, 1)))
+    there is no pivoting, so an indefinite A that runs into a zero pivot has to go through LUDecomposition
+    """
+
+    def _factor_dense(self, A):
+        """
+        one column at a time (left-looking), with v = L[j, :j] * d[:j]
+            d[j] = A[j, j] - L[j, :j] @ v
+            L[i, j] = (A[i, j] - L[i, :j] @ v) / d[j]     for i > j
+        """
+        n = A.shape[0]
+        L = np.identity(n)
+        d = np.zeros(n)
+        for j in range(n):
+            v = L[j, :j] * d[:j]
+            d[j] = A[j, j] - L[j, :j] @ v
+            if d[j] == 0:
+                raise ValueError("A zero pivot appeared, A needs a pivoted factorization (e.g. LUDecomposition).")
+            L[j+1:, j] = (A[j+1:, j] - L[j+1:, :j] @ v) / d[j]
+        return LDLFactorization(L, d)
+
+    def _factor_banded(self, A, h):
+        n = A.shape[0]
+        S, windows = self._band_windows(A, h)
+
+        d = np.zeros(n)
+        for j in range(n):                  # iterating over columns
+            block = windows[j]
+            d[j] = block[0, 0]
+            if d[j] == 0:
+                raise ValueError("A zero pivot appeared, A needs a pivoted factorization (e.g. LUDecomposition).")
+
+            # multipliers of column j, then a symmetric rank-1 update of the lower triangle of the rest of the window
+            multipliers = block[1:, 0] / d[j]
+            block[1:, 1:] -= np.tril(np.outer(multipliers, block[1:, 0]))
+            block[1:, 0] = multipliers
+            block[0, 0] = 1
+
+        return LDLFactorization(self._band_to_csr(S, n, h), d)
+
+    def _display_factorization(self, factorization):
+        L = self._dense(factorization.L)
+        print("L, D:")
+        self._display_matrix_update(L, factorization.D, L.T)
+        print()
+
+
+if __name__ == "__main__":
+
+    A = np.array([
+        [4, 2, 2],
+        [2, 5, 3],
+        [2, 3, 6]
+    ])
+
+    b = np.array([8, 10, 11])
+
+    for solver in (CholeskyDecomposition(verbose=True), LDLDecomposition(verbose=True)):
+        x = solver(A, b)
+        print("x =", x)
+        print("A @ x =", A @ x)
+        print()
+
+    # the 2-D Poisson problem is banded with half-bandwidth M, so the factors stay inside the band
+    from .sparse_matrix import CSRMatrix
+
+    M = 50
+    T = CSRMatrix.from_diagonals(M, (-1, 2, -1))
+    I = CSRMatrix.identity(M)
+    A = CSRMatrix.kron(I, T) + CSRMatrix.kron(T, I)
+    b = np.ones(M**2)
+
+    factorization = CholeskyDecomposition().factor(A)
+    x = factorization.solve(b)
+    print(f"2-D Poisson, n = {M**2}: nnz(L) = {factorization.L.nnz}, |A @ x - b| = {np.linalg.norm(A @ x - b)}")
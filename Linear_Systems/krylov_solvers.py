@@ -0,0 +1,260 @@
+import numpy as np
+
+from .linear_system_solver import LinearSystemSolver
+from .preconditioners import JacobiPreconditioner, SSORPreconditioner, ILUPreconditioner
+from iteration_history import IterationHistory
+
+class KrylovSolver(LinearSystemSolver):
+    """
+    Iterative solvers that build x from the Krylov subspace span{r0, A @ r0, A^2 @ r0, ...}
+        A can be a numpy array, a CSRMatrix, or a function x --> A @ x (matrix-free)
+        preconditioner can be "jacobi", "ssor", "ilu" (built from A), a Preconditioner, or a function r --> M^(-1) @ r
+    like ClassicalRelaxation, we stop once |b - A @ x| <= tol or after max_iter iterations (None means n)
+    """
+
+    preconditioners = {
+        "jacobi": JacobiPreconditioner,
+        "ssor": SSORPreconditioner,
+        "ilu": ILUPreconditioner
+    }
+
+    def __init__(self, tol=1e-5, max_iter=None, preconditioner=None, verbose=False, history="all", history_size=None):
+        super(KrylovSolver, self).__init__(verbose=verbose)
+        self.tol = tol
+        self.max_iter = max_iter
+        self.preconditioner = preconditioner
+
+        # what to keep in self.iterations, see IterationHistory for the policies
+        self.history = history
+        self.history_size = history_size
+        self.iterations = self._new_history()
+
+    def _new_history(self):
+        return IterationHistory(self.history, self.history_size)
+
+    def __call__(self, A, b, X0=None):
+        b = np.array(b, dtype=float)
+        n = len(b)
+
+        if X0 is None:
+            X0 = np.zeros(n)
+
+        self.iterations = self._new_history()
+        return self.solve(self._operator(A), b, np.array(X0, dtype=float), self._preconditioner(A))
+
+    @staticmethod
+    def _operator(A):
+        if callable(A) and not hasattr(A, "shape"):
+            return A
+        if not hasattr(A, "shape"):
+            A = np.array(A, dtype=float)
+        return lambda x: A @ x
+
+    def _preconditioner(self, A):
+        """
+        r --> M^(-1) @ r
+        """
+        M = self.preconditioner
+        if M is None:
+            return lambda r: r
+        if isinstance(M, str):
+            if M not in self.preconditioners:
+                raise ValueError(f"preconditioner must be one of {tuple(self.preconditioners)}. Currently {M}")
+            if callable(A) and not hasattr(A, "shape"):
+                raise ValueError(f"The '{M}' preconditioner is built from the entries of A, so A can't be matrix-free.")
+            return self.preconditioners[M](A)
+        return M
+
+    def _max_iter(self, n):
+        return n if self.max_iter is None else self.max_iter
+
+    def _record(self, k, X, residual):
+        if self.verbose:
+            print(f"Iteration {k}: |b - A @ X{k}| = {residual}")
+        self.iterations.append(X, residual=residual)
+
+    def solve(self, A, b, X0, M):
+        raise NotImplementedError("solve() function not yet implemented.")
+
+
+class ConjugateGradient(KrylovSolver):
+    """
+    For symmetric positive definite A (and M)
+        every iteration minimizes the A-norm of the error over a Krylov subspace one bigger than the last,
+        which takes O(sqrt(cond(A))) iterations instead of the O(cond(A)) of the relaxation methods
+    """
+
+    def solve(self, A, b, X0, M):
+        X = X0.copy()
+        r = b - A(X)
+        z = M(r)
+        p = z.copy()
+        rz = r @ z
+
+        k = 0
+        self._record(k, X, np.linalg.norm(r))
+        while np.linalg.norm(r) > self.tol and k < self._max_iter(len(b)):
+            k += 1
+
+            # step along p as far as it lowers the error, then make the next direction A-orthogonal to the previous ones
+            Ap = A(p)
+            alpha = rz / (p @ Ap)
+            X = X + alpha * p
+            r = r - alpha * Ap
+
+            z = M(r)
+            rz, rz_old = r @ z, rz
+            p = z + (rz / rz_old) * p
+
+            self._record(k, X, np.linalg.norm(r))
+
+        return X
+
+
+class GMRES(KrylovSolver):
+    """
+    For any non-singular A
+        picks the x in the Krylov subspace with the smallest residual, by building an orthonormal basis V of it (Arnoldi)
+        every iteration costs one more basis vector, so it starts over from the current x every `restart` iterations
+    preconditioned on the right, A @ M^(-1) @ y = b with x = M^(-1) @ y, so the residual we monitor is the true one
+    """
+
+    def __init__(self, restart=50, tol=1e-5, max_iter=None, preconditioner=None, verbose=False, history="all", history_size=None):
+        super(GMRES, self).__init__(tol=tol, max_iter=max_iter, preconditioner=preconditioner, verbose=verbose, history=history, history_size=history_size)
+        self.restart = restart
+
+    def solve(self, A, b, X0, M):
+        n = len(b)
+        m = min(self.restart, n)
+        max_iter = self._max_iter(n)
+
+        X = X0.copy()
+        r = b - A(X)
+        residual = np.linalg.norm(r)
+
+        k = 0
+        self._record(k, X, residual)
+        while residual > self.tol and k < max_iter:
+            V = np.zeros((m+1, n))
+            H = np.zeros((m+1, m))
+            C, S = np.zeros(m), np.zeros(m)
+            g = np.zeros(m+1)
+
+            V[0] = r / residual
+            g[0] = residual
+
+            for j in range(m):
+                k += 1
+
+                # Arnoldi, orthogonalizing A @ M^(-1) @ v_j against the basis so far (modified Gram-Schmidt)
+                w = A(M(V[j]))
+                for i in range(j+1):
+                    H[i, j] = w @ V[i]
+                    w = w - H[i, j] * V[i]
+                H[j+1, j] = np.linalg.norm(w)
+                if H[j+1, j] != 0:
+                    V[j+1] = w / H[j+1, j]
+
+                # the rotations from before, then a new one to zero H[j+1, j], keep H upper triangular
+                for i in range(j):
+                    H[i, j], H[i+1, j] = C[i] * H[i, j] + S[i] * H[i+1, j], -S[i] * H[i, j] + C[i] * H[i+1, j]
+                rho = np.hypot(H[j, j], H[j+1, j])
+                C[j], S[j] = H[j, j] / rho, H[j+1, j] / rho
+                H[j, j], H[j+1, j] = rho, 0
+                g[j], g[j+1] = C[j] * g[j], -S[j] * g[j]
+
+                # |g[j+1]| is the residual of the best x so far, without having to form it
+                residual = abs(g[j+1])
+                done = residual <= self.tol or k >= max_iter or j == m-1
+                X_k = None
+                if done or self.iterations.keeps_iterates:
+                    y = self.backward_substitution(H[:j+1, :j+1], g[:j+1])
+                    X_k = X + M(V[:j+1].T @ y)
+                self._record(k, X_k, residual)
+                if done:
+                    break
+
+            # restarting from the new x
+            X = X_k
+            r = b - A(X)
+            residual = np.linalg.norm(r)
+
+        return X
+
+
+class BiCGSTAB(KrylovSolver):
+    """
+    For any non-singular A, with short recurrences like CG so the memory cost doesn't grow with the iterations
+        BiCG's two-sided Krylov steps, each followed by a one-dimensional minimal residual step that smooths out its convergence
+    """
+
+    def solve(self, A, b, X0, M):
+        X = X0.copy()
+        r = b - A(X)
+        r_hat = r.copy()
+        rho = alpha = omega = 1.0
+        v = np.zeros(len(b))
+        p = np.zeros(len(b))
+
+        k = 0
+        self._record(k, X, np.linalg.norm(r))
+        while np.linalg.norm(r) > self.tol and k < self._max_iter(len(b)):
+            k += 1
+
+            rho, rho_old = r_hat @ r, rho
+            if rho == 0:
+                raise ValueError("BiCGSTAB broke down (r_hat @ r = 0), try a different X0.")
+
+            # BiCG step
+            p = r + (rho / rho_old) * (alpha / omega) * (p - omega * v)
+            p_hat = M(p)
+            v = A(p_hat)
+            alpha = rho / (r_hat @ v)
+            s = r - alpha * v
+
+            if np.linalg.norm(s) <= self.tol:
+                X = X + alpha * p_hat
+                r = s
+                self._record(k, X, np.linalg.norm(r))
+                break
+
+            # minimal residual step
+            s_hat = M(s)
+            t = A(s_hat)
+            omega = (t @ s) / (t @ t)
+            X = X + alpha * p_hat + omega * s_hat
+            r = s - omega * t
+
+            self._record(k, X, np.linalg.norm(r))
+
+        return X
+
+
+if __name__ == "__main__":
+
+    from .sparse_matrix import CSRMatrix
+
+    # 2-D Poisson problem, the same stencil in both directions of an M x M grid (like ClassicalRelaxation.B_2d)
+    M = 64
+    T = CSRMatrix.from_diagonals(M, (-1, 2, -1))
+    I = CSRMatrix.identity(M)
+    A = CSRMatrix.kron(I, T) + CSRMatrix.kron(T, I)
+    b = np.ones(M**2)
+
+    for Solver in (ConjugateGradient, GMRES, BiCGSTAB):
+        for preconditioner in (None, "jacobi", "ssor", "ilu"):
+            solver = Solver(tol=1e-8, preconditioner=preconditioner, history="residual")
+            x = solver(A, b)
+            print(f"{Solver.__name__:>17} {str(preconditioner):>6}: {solver.iterations.count - 1:4} iterations, |b - A @ x| = {np.linalg.norm(b - A @ x)}")
+    print()
+
+    # matrix-free, A @ x for the 1-D Poisson problem without storing A
+    def laplacian(x):
+        y = 2 * x
+        y[1:] -= x[:-1]
+        y[:-1] -= x[1:]
+        return y
+
+    solver = ConjugateGradient(tol=1e-8, verbose=False, history="residual")
+    x = solver(laplacian, np.ones(1000))
+    print(f"matrix-free CG: {solver.iterations.count - 1} iterations, |b - A @ x| = {np.linalg.norm(np.ones(1000) - laplacian(x))}")
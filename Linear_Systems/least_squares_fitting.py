@@ -1,11 +1,210 @@
 import numpy as np
 
-from linear_system_solver import LinearSystemSolver
+from .linear_system_solver import LinearSystemSolver
+
+
+class QRFactorization(object):
+    """
+    A thin A = Q @ R factorization of an m x n matrix (m >= n)
+        R is the n x n upper triangular factor
+        Q is never formed, we only keep the rotations/reflections that make it up
+    """
+
+    def __init__(self, A):
+        A = np.array(A, dtype=float)
+        m, n = A.shape
+        if m < n:
+            raise ValueError("A must have at least as many rows as columns.")
+
+        self.m, self.n = m, n
+        self.R = self._factor(A)[:n]
+
+    def _factor(self, A):
+        raise NotImplementedError("_factor() function not yet implemented.")
+
+    def apply_QT(self, b):
+        raise NotImplementedError("apply_QT() function not yet implemented.")
+
+    def apply_Q(self, y):
+        raise NotImplementedError("apply_Q() function not yet implemented.")
+
+    @property
+    def Q(self):
+        # the thin m x n Q, only formed on request
+        return self.apply_Q(np.identity(self.m)[:, :self.n])
+
+    def solve(self, b):
+        """
+        least squares solution of A @ x = b
+        where b is either a vector of length m or an (m, k) block of right-hand sides
+        """
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.m:
+            raise ValueError(f"b must have {self.m} rows. Currently {b.shape[0]}")
+
+        b = self.apply_QT(b)
+        return LinearSystemSolver.backward_substitution(self.R, b[:self.n])
+
+    def solve_transpose(self, b):
+        """
+        minimum norm solution of A.T @ x = b, i.e. x = Q @ R^(-T) @ b
+        where b is either a vector of length n or an (n, k) block of right-hand sides
+        """
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.n:
+            raise ValueError(f"b must have {self.n} rows. Currently {b.shape[0]}")
+
+        y = LinearSystemSolver.forward_substitution(self.R.T, b)
+        return self.apply_Q(np.concatenate((y, np.zeros((self.m - self.n,) + y.shape[1:]))))
+
+
+class GivensQR(QRFactorization):
+
+    @staticmethod
+    def _cascade(x):
+        """
+        Zeroing x[1:] with the rotations G(i, i+1), i = len(x)-2, ..., 0 (bottom to top)
+        produces the running values rho_i = hypot(x_i, rho_(i+1)), which are just the tail norms of x.
+        The products of consecutive sines telescope into ratios of rho, so the whole cascade can be
+        applied with cumulative sums instead of one rotation at a time.
+        The rotations only depend on the direction of x, so x and rho are returned divided by max|x|
+        and the tail norms come from hypot, which never squares, so nothing over/underflows whatever the scale of A
+        """
+        x = x / np.max(np.abs(x))
+        rho = np.hypot.accumulate(x[::-1])[::-1]
+
+        # nothing below the last entry, so it is never rotated
+        rho[-1] = x[-1]
+        return x, rho
+
+    @staticmethod
+    def _apply_cascade(M, x, rho):
+        # carried values v_i = (x[i:] . M[i:]) / rho_i
+        xM = x * M.T
+        v = (np.cumsum(xM[..., ::-1], axis=-1)[..., ::-1] / rho).T
+
+        # the ratios are the cosines and sines, all at most 1 in magnitude
+        out = np.empty_like(M)
+        out[0] = v[0]
+        out[1:] = (-(rho[1:] / rho[:-1]) * M[:-1].T + (x[:-1] / rho[:-1]) * v[1:].T).T
+        return out
+
+    @staticmethod
+    def _apply_cascade_transpose(Y, x, rho):
+        # inverse of _apply_cascade, i.e. the same rotations transposed and applied top to bottom
+        S = ((x[:-1] / rho[:-1]) * Y[1:].T) / rho[1:]
+        S = np.concatenate((np.zeros_like(S[..., :1]), np.cumsum(S, axis=-1)), axis=-1)
+        S = S + np.asarray(Y[0] / rho[0])[..., None]
+
+        out = x * S
+        out[..., :-1] -= (rho[1:] / rho[:-1]) * Y[1:].T
+        return out.T
+
+    def _factor(self, R):
+        m, n = R.shape
+
+        # rotations[c] holds (start, x, rho) for the rotations of rows (i, i+1), i = end-1, ..., c
+        # rows past the last nonzero of the column are left alone
+        self.rotations = []
+        for c in range(n):              # iterating over columns
+
+            # Checking for an all zero column
+            nonzero = np.flatnonzero(R[c:, c])
+            if len(nonzero) == 0:
+                raise ValueError("An all-zero column appeared, which means A must be singular. Thus, the system has no solution.")
+
+            end = c + nonzero[-1] + 1
+            if end - c > 1:
+                x, rho = self._cascade(R[c:end, c])
+
+                R[c:end, c:] = self._apply_cascade(R[c:end, c:], x, rho)
+                R[c+1:end, c] = 0
+
+                self.rotations.append( (c, end, x, rho) )
+
+        return R
+
+    def apply_QT(self, b):
+        b = np.array(b, dtype=float)
+        for c, end, x, rho in self.rotations:
+            b[c:end] = self._apply_cascade(b[c:end], x, rho)
+        return b
+
+    def apply_Q(self, y):
+        y = np.array(y, dtype=float)
+        for c, end, x, rho in reversed(self.rotations):
+            y[c:end] = self._apply_cascade_transpose(y[c:end], x, rho)
+        return y
+
+
+class HouseholderQR(QRFactorization):
+
+    def _factor(self, R):
+        m, n = R.shape
+
+        # reflectors[c] holds (v, beta) for H = I - beta * v @ v.T acting on rows c, ..., m-1
+        self.reflectors = []
+        for c in range(n):              # iterating over columns
+            x = R[c:, c]
+
+            # Checking for an all zero column
+            scale = np.max(np.abs(x))
+            if scale == 0:
+                raise ValueError("An all-zero column appeared, which means A must be singular. Thus, the system has no solution.")
+
+            # H only depends on the direction of v, so we build it from x / max|x|,
+            # otherwise |x|^2 and v @ v overflow (or underflow) long before the entries of A do
+            x = x / scale
+            norm_x = np.linalg.norm(x)
+
+            # reflect x onto -sign(x_0) * |x| * e_1 to avoid cancellation
+            alpha = -norm_x if x[0] >= 0 else norm_x
+            v = x.copy()
+            v[0] -= alpha
+            beta = 2 / (v @ v)
+
+            R[c:, c:] -= beta * np.outer(v, v @ R[c:, c:])
+            R[c+1:, c] = 0
+
+            self.reflectors.append( (v, beta) )
+
+        return R
+
+    @staticmethod
+    def _reflect(M, c, v, beta):
+        if M.ndim == 1:
+            M[c:] -= beta * v * (v @ M[c:])
+        else:
+            M[c:] -= beta * np.outer(v, v @ M[c:])
+
+    def apply_QT(self, b):
+        b = np.array(b, dtype=float)
+        for c, (v, beta) in enumerate(self.reflectors):
+            self._reflect(b, c, v, beta)
+        return b
+
+    def apply_Q(self, y):
+        y = np.array(y, dtype=float)
+        for c, (v, beta) in reversed(list(enumerate(self.reflectors))):
+            self._reflect(y, c, v, beta)
+        return y
+
 
 class LeastSquaresFitting(LinearSystemSolver):
 
-    def __init__(self, verbose=False):
+    methods = {
+        "givens": GivensQR,
+        "householder": HouseholderQR,
+    }
+
+    modes = ("reduced", "complete")
+
+    def __init__(self, verbose=False, method="givens"):
         super(LeastSquaresFitting, self).__init__(verbose=verbose)
+
+        if method not in self.methods:
+            raise ValueError(f"method must be one of {list(self.methods)}")
+        self.method = method
     
     def __call__(self, A, b):
         return self.solve(A=A, b=b)
@@ -24,10 +223,42 @@ class LeastSquaresFitting(LinearSystemSolver):
 
         return G, G.T
 
-    def decompose(self, A):
+    def factor(self, A, method=None):
+        """
+        Returns a QRFactorization of A which can be reused for any number of right-hand sides
+        """
+        if method is None:
+            method = self.method
+        if method not in self.methods:
+            raise ValueError(f"method must be one of {list(self.methods)}")
+
+        factorization = self.methods[method](A)
+        self.R = factorization.R
+        return factorization
+
+    def decompose(self, A, method=None, mode="reduced"):
+        """
+        A = Q @ R, in the same form whether or not we're printing
+            mode="reduced":  the thin m x n Q and n x n R
+            mode="complete": the full orthogonal m x m Q and m x n R
+        """
+        if mode not in self.modes:
+            raise ValueError(f"mode must be one of {self.modes}. Currently {mode}")
+
+        # the explicit rotations are only worth their cost when we want to print them
+        if not self.verbose:
+            factorization = self.factor(A, method=method)
+            m, n = factorization.m, factorization.n
+            if mode == "reduced":
+                self.Q = factorization.Q
+            else:
+                self.Q = factorization.apply_Q(np.identity(m))
+                self.R = np.concatenate((self.R, np.zeros((m - n, n))))
+            return self.Q, self.R
+
         m, n = A.shape
 
-        R = A.copy()
+        R = np.array(A, dtype=float)
         Q = np.identity(m)
         for c in range(n):              # iterating over columns
 
@@ -76,7 +307,10 @@ class LeastSquaresFitting(LinearSystemSolver):
 
         if self.verbose:
             print("\n")
-        
+
+        if mode == "reduced":
+            Q, R = Q[:, :n], R[:n]
+
         self.Q = Q
         self.R = R
         return Q, R
@@ -84,6 +318,9 @@ class LeastSquaresFitting(LinearSystemSolver):
 
     def solve(self, A, b):
 
+        if not self.verbose:
+            return self.factor(A).solve(b)
+
         # preform QR decomposition
         Q, R = self.decompose(A)
 
@@ -1,5 +1,7 @@
 import numpy as np
 
+from .sparse_matrix import is_sparse
+
 class LinearSystemSolver(object):
 
     def __init__(self, verbose=False):
@@ -62,44 +64,231 @@ class LinearSystemSolver(object):
         
         return True
 
+    @staticmethod
+    def is_symmetric(A, rtol=1e-12):
+        m, n = A.shape
+        if m != n:
+            return False
+        if is_sparse(A):
+            # the stored entries sorted by (column, row) have to line up with the ones sorted by (row, column)
+            keys = A.row_indices * n + A.indices
+            order = np.argsort(A.indices * n + A.row_indices, kind="stable")
+            if not np.array_equal(keys, keys[order] // n + keys[order] % n * n):
+                return False
+            difference = A.data - A.data[order]
+            scale = np.abs(A.data).max() if A.nnz > 0 else 0
+        else:
+            A = np.asarray(A, dtype=float)
+            difference = A - A.T
+            scale = np.abs(A).max() if A.size > 0 else 0
+        return difference.size == 0 or np.abs(difference).max() <= rtol * scale
+
+    @staticmethod
+    def is_diagonally_dominant(A):
+        """
+        strictly diagonally dominant by rows, |a_ii| > sum of |a_ij| over j != i
+        """
+        if is_sparse(A):
+            diagonal = np.abs(A.diagonal())
+            row_sums = np.bincount(A.row_indices, weights=np.abs(A.data), minlength=A.shape[0])
+        else:
+            A = np.asarray(A, dtype=float)
+            diagonal = np.abs(np.diag(A))
+            row_sums = np.abs(A).sum(axis=1)
+        return bool(np.all(diagonal > row_sums - diagonal))
+
     # FIXME: make these work for general m x n matrices
     @staticmethod
-    def forward_substitution(L, b):
+    def forward_substitution(L, b, block_size=None, unit_diagonal=False):
         """
         solving L @ x = b for x 
         where L is a lower triangular matrix
+            b can be a vector or an (n, k) block of right-hand sides
+            block_size switches to the column-oriented blocked sweep
+            unit_diagonal = True takes L's diagonal to be ones without reading it, and never reads above it either,
+            so L can be the packed LU array of an LUFactorization
         """
         m, n = L.shape
+        b = np.asarray(b, dtype=float)
+
+        if is_sparse(L):
+            return LinearSystemSolver._sparse_substitution(L, b, reversed_order=False, unit_diagonal=unit_diagonal)
+        if block_size is not None:
+            return LinearSystemSolver._blocked_forward_substitution(L, b, block_size, unit_diagonal=unit_diagonal)
 
-        x = np.zeros(n, dtype=float)
+        x = np.zeros((n,) + b.shape[1:], dtype=float)
         for i in range(n):
-            s = sum([L[i, j] * x[j] for j in range(0, i)])
-            x[i] = (b[i] - s) / L[i, i]
+            s = L[i, :i] @ x[:i]
+            x[i] = (b[i] - s) if unit_diagonal else (b[i] - s) / L[i, i]
 
         return x
 
     @staticmethod
-    def backward_substitution(U, b):
+    def backward_substitution(U, b, block_size=None, unit_diagonal=False):
         """
         solving U @ x = b for x 
         where U is an upper triangular matrix
+            b can be a vector or an (n, k) block of right-hand sides
+            block_size switches to the column-oriented blocked sweep
+            unit_diagonal like forward_substitution, only the part above the diagonal is read
         """
         m, n = U.shape
+        b = np.asarray(b, dtype=float)
 
-        x = np.zeros(n, dtype=float)
+        if is_sparse(U):
+            return LinearSystemSolver._sparse_substitution(U, b, reversed_order=True, unit_diagonal=unit_diagonal)
+        if block_size is not None:
+            return LinearSystemSolver._blocked_backward_substitution(U, b, block_size, unit_diagonal=unit_diagonal)
+
+        x = np.zeros((n,) + b.shape[1:], dtype=float)
         for i in reversed(range(n)):
-            s = sum([U[i, j] * x[j] for j in range(i+1, n)])
-            x[i] = (b[i] - s) / U[i, i]
+            s = U[i, i+1:n] @ x[i+1:n]
+            x[i] = (b[i] - s) if unit_diagonal else (b[i] - s) / U[i, i]
             
         return x
+
+    @staticmethod
+    def _sparse_substitution(T, b, reversed_order=False, unit_diagonal=False):
+        """
+        triangular solve with a CSRMatrix, each row only touches its stored values so the cost is O(nnz)
+        """
+        m, n = T.shape
+        diag = np.ones(n) if unit_diagonal else T.diagonal()
+        order = reversed(range(n)) if reversed_order else range(n)
+
+        # the entries of x we haven't solved for yet are still 0, so they drop out of the row products
+        if b.ndim > 1:
+            x = np.zeros((n,) + b.shape[1:], dtype=float)
+            for i in order:
+                cols, vals = T.row(i)
+                x[i] = (b[i] - vals @ x[cols]) / diag[i]
+            return x
+
+        # a single right-hand side has so few values per row that plain python floats beat numpy's per-call overhead
+        data, indices, indptr = T.data.tolist(), T.indices.tolist(), T.indptr.tolist()
+        diag, b = diag.tolist(), b.tolist()
+        x = [0.0] * n
+        for i in order:
+            s = 0.0
+            for k in range(indptr[i], indptr[i+1]):
+                s += data[k] * x[indices[k]]
+            x[i] = (b[i] - s) / diag[i]
+
+        return np.array(x)
+
+    @staticmethod
+    def _blocked_forward_substitution(L, b, block_size, unit_diagonal=False):
+        m, n = L.shape
+
+        # x starts out as b and is overwritten one block at a time
+        x = np.array(b[:n], dtype=float)
+        for k0 in range(0, n, block_size):
+            k1 = min(k0 + block_size, n)
+
+            # solve the diagonal block
+            for i in range(k0, k1):
+                x[i] = x[i] - L[i, k0:i] @ x[k0:i]
+                if not unit_diagonal:
+                    x[i] /= L[i, i]
+
+            # eliminate this block's columns from the remaining rows with a single product
+            x[k1:] -= L[k1:n, k0:k1] @ x[k0:k1]
+
+        return x
+
+    @staticmethod
+    def _blocked_backward_substitution(U, b, block_size, unit_diagonal=False):
+        m, n = U.shape
+
+        # x starts out as b and is overwritten one block at a time
+        x = np.array(b[:n], dtype=float)
+        for k1 in range(n, 0, -block_size):
+            k0 = max(k1 - block_size, 0)
+
+            # solve the diagonal block
+            for i in reversed(range(k0, k1)):
+                x[i] = x[i] - U[i, i+1:k1] @ x[i+1:k1]
+                if not unit_diagonal:
+                    x[i] /= U[i, i]
+
+            # eliminate this block's columns from the remaining rows with a single product
+            x[:k0] -= U[:k0, k0:k1] @ x[k0:k1]
+
+        return x
     
     @staticmethod
-    def pseudo_inverse(A):
+    def batched_solve(A, b, tol=None):
+        """
+        solving the independent systems A[i] @ x[i] = b[i] all at once
+            A is a (batch, n, n) stack, b is (batch, n) or (batch, n, k)
+        Gaussian elimination with partial pivoting, where every step is a single numpy operation across the batch,
+        so for the small systems (n <= 8 or so) we'd otherwise loop over it's about as fast per system as it gets in numpy
+        returns (x, singular) where singular[i] is True when A[i] had a pivot below tol (default n * eps * max|A[i]|),
+        x[i] is then all nan and the rest of the batch is unaffected
+        """
+        A = np.array(A, dtype=float)
+        b = np.array(b, dtype=float)
+        if A.ndim != 3 or A.shape[1] != A.shape[2]:
+            raise ValueError(f"A must be a (batch, n, n) stack of square matrices. Currently {A.shape}")
+        if b.shape[:2] != A.shape[:2]:
+            raise ValueError(f"b must have shape {A.shape[:2]} or {A.shape[:2] + ('k',)}. Currently {b.shape}")
+
+        vector = b.ndim == 2
+        if vector:
+            b = b[:, :, None]
+
+        batch, n = A.shape[:2]
+        members = np.arange(batch)
+        if tol is None:
+            tol = n * np.finfo(float).eps * np.abs(A).max(axis=(1, 2))
+        singular = np.zeros(batch, dtype=bool)
+
+        for j in range(n):                  # iterating over columns
+
+            # every member swaps its own pivot row into place
+            p = j + np.argmax(np.abs(A[:, j:, j]), axis=1)
+            A[members, j], A[members, p] = A[members, p], A[members, j].copy()
+            b[members, j], b[members, p] = b[members, p], b[members, j].copy()
+
+            # a singular member keeps going with a harmless pivot, so it can't spread nan or inf to the others
+            pivot = A[:, j, j]
+            small = np.abs(pivot) <= tol
+            singular |= small
+            pivot = np.where(small, 1.0, pivot)
+            A[:, j, j] = pivot
+
+            multipliers = A[:, j+1:, j] / pivot[:, None]
+            A[:, j+1:, j:] -= multipliers[:, :, None] * A[:, None, j, j:]
+            b[:, j+1:] -= multipliers[:, :, None] * b[:, None, j]
+
+        x = np.zeros_like(b)
+        for i in reversed(range(n)):
+            s = np.einsum("bj,bjk->bk", A[:, i, i+1:], x[:, i+1:])
+            x[:, i] = (b[:, i] - s) / A[:, i, i, None]
+
+        x[singular] = np.nan
+        return (x[:, :, 0] if vector else x), singular
+
+    # how analytical_solution and pseudo_inverse get their answer, see analytical_solution
+    solution_methods = ("auto", "inverse", "cholesky", "ldl", "qr", "lu")
+
+    @staticmethod
+    def pseudo_inverse(A, method="qr"):
         """
         The Moore-Penrose Pseudo Inverse
+            method = "inverse" uses the formulas below as written,
+            the others solve for A^+ column by column (analytical_solution with b = I) without inverting anything
         """
+        if method not in LinearSystemSolver.solution_methods:
+            raise ValueError(f"method must be one of {LinearSystemSolver.solution_methods}. Currently {method}")
+        if is_sparse(A):
+            A = A.toarray()
+        A = np.asarray(A, dtype=float)
         m, n = A.shape
 
+        if method != "inverse":
+            return LinearSystemSolver.analytical_solution(A, np.identity(m), method=method)
+
         if m < n:                   # under-determined system
             return A.T @ np.linalg.inv( A @ A.T )
         elif m == n:                # uniquely-determined system
@@ -108,6 +297,119 @@ class LinearSystemSolver(object):
             return np.linalg.inv( A.T @ A ) @ A.T
 
     @staticmethod
-    def analytical_solution(A, b):
-        A_pseudo_inverse = LinearSystemSolver.pseudo_inverse(A)
-        return A_pseudo_inverse @ b
\ No newline at end of file
+    def analytical_solution(A, b, method="qr"):
+        """
+        x = A^+ @ b, i.e. the least squares solution when m > n and the minimum norm solution when m < n
+            "inverse"   forms A^+ (see pseudo_inverse)
+            "cholesky"  Cholesky of a symmetric A, otherwise on the normal equations A.T @ A @ x = A.T @ b,
+                        or A @ A.T @ y = b with x = A.T @ y when m < n, which squares cond(A)
+            "qr"        QR of A, or of A.T when m < n (then x = Q @ R^(-T) @ b), which keeps cond(A)
+            "ldl"       LDL.T, for a symmetric A or the normal equations like "cholesky"
+            "lu"        LU of A, or of the normal equations like "cholesky" when A isn't square
+            "auto"      picks from A's structure, see _auto_solution
+        all but "inverse" cost one factorization and a few triangular sweeps
+        """
+        # imported here since they are all built on this class
+        from .lu_decomposition import LUDecomposition
+        from .least_squares_fitting import LeastSquaresFitting
+        from .cholesky_decomposition import CholeskyDecomposition, LDLDecomposition
+
+        if method not in LinearSystemSolver.solution_methods:
+            raise ValueError(f"method must be one of {LinearSystemSolver.solution_methods}. Currently {method}")
+        if method == "inverse":
+            return LinearSystemSolver.pseudo_inverse(A, method="inverse") @ b
+
+        # QR is the only one that needs A dense
+        if is_sparse(A) and method == "qr":
+            A = A.toarray()
+        if not is_sparse(A):
+            A = np.asarray(A, dtype=float)
+        b = np.asarray(b, dtype=float)
+        m, n = A.shape
+
+        if method == "auto":
+            return LinearSystemSolver._auto_solution(A, b)
+
+        if method == "qr":
+            if m < n:
+                return LeastSquaresFitting().factor(A.T).solve_transpose(b)
+            return LeastSquaresFitting().factor(A).solve(b)
+
+        if method == "lu" and m == n:
+            # pivoted like _auto_solution, the inverse it replaces had no trouble with a zero or tiny leading pivot
+            return LUDecomposition().factor(A, minimize_roundoff=True).solve(b)
+
+        # a symmetric A can be factored directly, the normal equations would square its condition number
+        if method in ("cholesky", "ldl") and m == n and LinearSystemSolver.is_symmetric(A):
+            Decomposition = CholeskyDecomposition if method == "cholesky" else LDLDecomposition
+            return Decomposition(check_symmetry=False).factor(A).solve(b)
+
+        factor = {
+            "cholesky": CholeskyDecomposition(check_symmetry=False).factor,
+            "ldl": LDLDecomposition(check_symmetry=False).factor,
+            "lu": LUDecomposition().factor
+        }[method]
+        if m < n:
+            return A.T @ factor(A @ A.T).solve(b)
+        return factor(A.T @ A).solve(A.T @ b)
+
+    @staticmethod
+    def _auto_solution(A, b):
+        """
+            non-square              QR
+            (cyclic) tridiagonal    the Thomas algorithm, O(n), when A is diagonally dominant or symmetric definite
+            symmetric               Cholesky of A (or of -A), or LDL.T when A is diagonally dominant
+            anything else           LU, pivoted by scaled rows
+        the unpivoted solvers are only ever used when we know they are stable, a tiny pivot gives a wrong x without any error
+        (e.g. [[1e-17, 1], [1, 1]]), so everything else goes to the pivoted LU
+        """
+        from .lu_decomposition import LUDecomposition
+        from .tridiagonal_solver import TridiagonalSolver
+        from .cholesky_decomposition import CholeskyDecomposition, LDLDecomposition
+
+        m, n = A.shape
+        if m != n:
+            return LinearSystemSolver.analytical_solution(A, b, method="qr")
+
+        # the symmetry check is O(nnz), which for a cyclic tridiagonal A isn't worth doing
+        try:
+            a, d, c, alpha, beta = TridiagonalSolver.diagonals(A)
+        except ValueError:
+            symmetric = LinearSystemSolver.is_symmetric(A)
+        else:
+            if TridiagonalSolver._is_stable(a, d, c, alpha, beta):
+                if alpha != 0 or beta != 0:
+                    return TridiagonalSolver.cyclic(a, d, c, b, alpha, beta)
+                return TridiagonalSolver.thomas(a, d, c, b)
+            symmetric = False
+
+        if symmetric:
+            # Cholesky only succeeds when A is definite, and then it is stable without pivoting
+            for sign in (1, -1):
+                try:
+                    return CholeskyDecomposition(check_symmetry=False).factor(A * sign).solve(b * sign)
+                except ValueError:
+                    pass
+            if LinearSystemSolver.is_diagonally_dominant(A):
+                return LDLDecomposition(check_symmetry=False).factor(A).solve(b)
+
+        return LUDecomposition().factor(A, minimize_roundoff=True).solve(b)
+
+if __name__ == "__main__":
+
+    # "auto" on matrices where solving without pivoting gives a wrong x, each of these needs the pivoted LU
+    #   symmetric with a tiny pivot, x = [1, 1]
+    #   tridiagonal with a tiny pivot, x[0] = 1/6
+    #   symmetric indefinite
+    rng = np.random.default_rng(0)
+    B = rng.standard_normal((5, 5))
+
+    for A, b in [
+        ( np.array([[1e-17, 1], [1, 1]]), np.array([1, 2]) ),
+        ( np.array([[1e-17, 1, 0], [2, 1, 1], [0, 1, 3]]), np.array([1, 2, 3]) ),
+        ( B + B.T, np.ones(5) ),
+    ]:
+        x = LinearSystemSolver.analytical_solution(A, b, method="auto")
+        print("x =", x)
+        print("|A @ x - b| =", np.linalg.norm(A @ x - b))
+        print()
@@ -0,0 +1,36 @@
+import sys
+import time
+import numpy as np
+
+from .lu_decomposition import LUDecomposition
+
+
+def benchmark(solver, A, repeats=1):
+    """
+    best wall-clock time of solver.factor(A) over a few repeats
+    """
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        solver.factor(A, minimize_roundoff=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+
+    # python -m Linear_Systems.lu_benchmark [n ...]
+    sizes = [int(n) for n in sys.argv[1:]] or [100, 250, 500, 1000, 2000, 4000]
+
+    solvers = {
+        "naive": LUDecomposition(),
+        "blocked": LUDecomposition(block_size=64),
+        "blocked, 4 threads": LUDecomposition(block_size=64, n_threads=4),
+    }
+
+    rng = np.random.default_rng(0)
+    print(f"{'n':>6}" + "".join(f"{name:>22}" for name in solvers) + f"{'speedup':>10}")
+    for n in sizes:
+        A = rng.standard_normal((n, n))
+        times = [benchmark(solver, A, repeats=3 if n <= 500 else 1) for solver in solvers.values()]
+        print(f"{n:>6}" + "".join(f"{t:>21.3f}s" for t in times) + f"{times[0] / min(times[1:]):>9.1f}x")
@@ -1,17 +1,168 @@
 import numpy as np
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from linear_system_solver import LinearSystemSolver
+from .linear_system_solver import LinearSystemSolver
+from .sparse_matrix import CSRMatrix, is_sparse
+from .matrix_norms import inf_norm
+
+
+class LUFactorization(object):
+    """
+    A reusable P @ A = L @ U factorization
+        factor once with LUDecomposition.factor(A), then call .solve(b) for as many b as you like
+    only the packed LU array and the permutation vector are stored, L and U are built on request and not kept
+    """
+
+    def __init__(self, LU, perm):
+        self.LU = LU
+        self.perm = perm
+        self.n = LU.shape[0]
+
+    @property
+    def L(self):
+        return np.tril(self.LU, k=-1) + np.identity(self.n, dtype=self.LU.dtype)
+
+    @property
+    def U(self):
+        return np.triu(self.LU)
+
+    @property
+    def P(self):
+        return np.identity(self.n)[self.perm]
+
+    def solve(self, b, block_size=None):
+        """
+        solving A @ x = b for x
+        where b is either a vector of length n or an (n, k) block of right-hand sides
+        """
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.n:
+            raise ValueError(f"b must have {self.n} rows. Currently {b.shape[0]}")
+
+        # permuting b to match the L and U matrices, then one forward and one backward sweep for all columns
+        # both sweeps read the packed array directly, the forward one only below the diagonal (L's diagonal is all ones)
+        y = LinearSystemSolver.forward_substitution(self.LU, b[self.perm], block_size=block_size, unit_diagonal=True)
+        return LinearSystemSolver.backward_substitution(self.LU, y, block_size=block_size)
+
+    def solve_transpose(self, b):
+        """
+        solving A.T @ x = b for x with the same factors
+            A.T = U.T @ L.T @ P, so a forward sweep with U.T, a backward sweep with L.T, then undoing the permutation
+        """
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.n:
+            raise ValueError(f"b must have {self.n} rows. Currently {b.shape[0]}")
+
+        # LU.T holds U.T below (and on) the diagonal and L.T strictly above it
+        y = LinearSystemSolver.forward_substitution(self.LU.T, b)
+        z = LinearSystemSolver.backward_substitution(self.LU.T, y, unit_diagonal=True)
+        x = np.empty_like(z)
+        x[self.perm] = z
+        return x
+
+    def refine(self, A, b, tol=None, max_iter=10):
+        """
+        iterative refinement of the solution of A @ x = b
+            the residual r = b - A @ x is computed in double precision and the correction solves A @ d = r with our factors,
+            so factors computed in single precision still give a double precision x, as long as cond(A) is well below 1 / eps_single
+        stops once the backward error |b - A @ x| / (|A| |x| + |b|) (inf-norms) is below tol (default sqrt(n) * eps),
+        or when a correction stops making it smaller
+        returns (x, steps, backward_error)
+        """
+        b = np.asarray(b, dtype=float)
+        if tol is None:
+            tol = np.sqrt(self.n) * np.finfo(float).eps
+
+        A_norm = inf_norm(A)
+        def backward_error(x, r):
+            # the worst column when b is a block of right-hand sides
+            return np.max(np.max(np.abs(r), axis=0) / (A_norm * np.max(np.abs(x), axis=0) + np.max(np.abs(b), axis=0)))
+
+        x = self.solve(b)
+        r = b - A @ x
+        error = backward_error(x, r)
+
+        steps = 0
+        while error > tol and steps < max_iter:
+            x_new = x + self.solve(r)
+            r_new = b - A @ x_new
+            error_new = backward_error(x_new, r_new)
+            if error_new >= error:
+                break
+            x, r, error = x_new, r_new, error_new
+            steps += 1
+
+        return x, steps, error
+
+
+class SparseLUFactorization(LUFactorization):
+    """
+    P @ A = L @ U where L, U and P are all kept as CSRMatrix
+    """
+
+    def __init__(self, L, U, perm):
+        self.LU = None
+        self.perm = perm
+        self.n = U.shape[0]
+        self._L = L
+        self._U = U
+
+    # the sparse factors are what we store, so these hand them back as they are
+    @property
+    def L(self):
+        return self._L
+
+    @property
+    def U(self):
+        return self._U
+
+    @property
+    def P(self):
+        return CSRMatrix.from_coo(np.arange(self.n), self.perm, np.ones(self.n), (self.n, self.n))
+
+    def solve(self, b, block_size=None):
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.n:
+            raise ValueError(f"b must have {self.n} rows. Currently {b.shape[0]}")
+
+        y = LinearSystemSolver.forward_substitution(self.L, b[self.perm])
+        return LinearSystemSolver.backward_substitution(self.U, y)
+
+    def solve_transpose(self, b):
+        b = np.asarray(b, dtype=float)
+        if b.shape[0] != self.n:
+            raise ValueError(f"b must have {self.n} rows. Currently {b.shape[0]}")
+
+        y = LinearSystemSolver.forward_substitution(self.U.T, b)
+        z = LinearSystemSolver.backward_substitution(self.L.T, y)
+        x = np.empty_like(z)
+        x[self.perm] = z
+        return x
 
 
 class LUDecomposition(LinearSystemSolver):
 
     # TODO: implement LU decomposition for non-square matrices
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, cache_size=0, block_size=None, n_threads=None, refine_tol=None, max_refinements=10):
         super(LUDecomposition, self).__init__(verbose=verbose)
+
+        # cache_size > 0 keeps that many factorizations around, least recently used is evicted first
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+        # block_size switches dense factorizations to the blocked algorithm, see _factor_blocked
+        self.block_size = block_size
+        self.n_threads = n_threads
+
+        # see solve(refine=True) and LUFactorization.refine
+        self.refine_tol = refine_tol
+        self.max_refinements = max_refinements
     
-    def __call__(self, A, b, pivot=True, minimize_roundoff=False):
-        return self.solve(A=A, b=b, pivot=pivot, minimize_roundoff=minimize_roundoff)
+    def __call__(self, A, b, pivot=True, minimize_roundoff=False, refine=False):
+        return self.solve(A=A, b=b, pivot=pivot, minimize_roundoff=minimize_roundoff, refine=refine)
 
     """ Matrix Operation Functions """
     # TODO: generalize for any matrix A
@@ -39,10 +190,229 @@ class LUDecomposition(LinearSystemSolver):
         return E, E_inv
     
     def decompose(self, A, pivot=True, minimize_roundoff=False):
+        if not is_sparse(A):
+            A = np.array(A)
         m, n = A.shape
         if m != n:
             raise ValueError("A must be a square matrix.")
 
+        # sparse matrices keep their storage, so we return sparse factors
+        if is_sparse(A):
+            factorization = self._factor_sparse(A, pivot=pivot, minimize_roundoff=minimize_roundoff)
+            L, U, P = factorization.L, factorization.U, factorization.P
+
+        # the matrix-by-matrix trace is only worth its cost when we want to print it
+        elif self.verbose:
+            L, U, P = self._decompose_trace(A, pivot=pivot, minimize_roundoff=minimize_roundoff)
+        else:
+            LU, perm = self._factor_dense(A, pivot=pivot, minimize_roundoff=minimize_roundoff)
+            L, U, P = self._unpack(LU, perm)
+
+        self.L = L
+        self.U = U
+        self.P = P
+        return L, U, P
+
+    @staticmethod
+    def _factor_inplace(A, pivot=True, minimize_roundoff=False, dtype=float):
+        """
+        Factors P @ A = L @ U in a single n x n array (of the given dtype)
+            the strictly lower part holds the multipliers of L (the unit diagonal is implied)
+            the upper part holds U
+        P is kept as a permutation vector, i.e. P @ A == A[perm]
+        """
+        n = A.shape[0]
+        LU = np.array(A, dtype=dtype)
+        perm = np.arange(n)
+
+        # the last column is visited too, so a zero last pivot is caught by the all-zero check
+        for j in range(n):                  # iterating over columns
+
+            # Checking for an all zero column
+            col = LU[j:, j]
+            if not np.any(col):
+                raise ValueError("An all-zero column appeared, which means A must be singular. Thus, the system has no solution.")
+
+            # same pivoting rule as the trace below
+            if minimize_roundoff or LU[j, j] == 0:
+
+                if not pivot:
+                    raise ValueError("There is a 0 on the main diagonal, which requires a pivot in order to decompose.")
+
+                p = j + np.argmax(np.abs(col))
+                if p != j:
+                    # swapping the whole row also swaps the multipliers already stored in L
+                    LU[[j, p]] = LU[[p, j]]
+                    perm[[j, p]] = perm[[p, j]]
+
+            # multipliers of column j, then a rank-1 update of the Schur complement
+            LU[j+1:, j] /= LU[j, j]
+            LU[j+1:, j+1:] -= np.outer(LU[j+1:, j], LU[j, j+1:])
+
+        return LU, perm
+
+    def _factor_dense(self, A, pivot=True, minimize_roundoff=False, dtype=float):
+        if self.block_size is None or self.block_size >= A.shape[0]:
+            return self._factor_inplace(A, pivot=pivot, minimize_roundoff=minimize_roundoff, dtype=dtype)
+        return self._factor_blocked(A, pivot=pivot, minimize_roundoff=minimize_roundoff, dtype=dtype,
+                                    block_size=self.block_size, n_threads=self.n_threads)
+
+    @staticmethod
+    def _factor_blocked(A, pivot=True, minimize_roundoff=False, dtype=float, block_size=64, n_threads=None):
+        """
+        Same P @ A = L @ U (and the same pivots) as _factor_inplace, a block of columns at a time (right-looking)
+            1. factor the panel LU[k0:, k0:k1] with rank-1 updates that stay inside the panel
+            2. finish the block row, U12 = L11^(-1) @ A12
+            3. update the trailing matrix with one matrix-matrix product, A22 -= L21 @ U12
+        the rank-1 updates of _factor_inplace read and write the whole trailing matrix once per column,
+        this does it once per block_size columns, and the product runs at matrix-matrix (level 3) speed
+        n_threads > 1 splits the trailing update into column strips that run on a thread pool
+        """
+        n = A.shape[0]
+        LU = np.array(A, dtype=dtype)
+        perm = np.arange(n)
+
+        pool = ThreadPoolExecutor(n_threads) if n_threads is not None and n_threads > 1 else None
+        try:
+            for k0 in range(0, n, block_size):
+                k1 = min(k0 + block_size, n)
+
+                # 1. panel
+                for j in range(k0, k1):     # includes the last column, so its pivot gets checked too
+
+                    # Checking for an all zero column
+                    col = LU[j:, j]
+                    if not np.any(col):
+                        raise ValueError("An all-zero column appeared, which means A must be singular. Thus, the system has no solution.")
+
+                    if minimize_roundoff or LU[j, j] == 0:
+
+                        if not pivot:
+                            raise ValueError("There is a 0 on the main diagonal, which requires a pivot in order to decompose.")
+
+                        p = j + np.argmax(np.abs(col))
+                        if p != j:
+                            # whole rows, so the multipliers to the left and the rows to the right of the panel come along
+                            LU[[j, p]] = LU[[p, j]]
+                            perm[[j, p]] = perm[[p, j]]
+
+                    LU[j+1:, j] /= LU[j, j]
+                    LU[j+1:, j+1:k1] -= np.outer(LU[j+1:, j], LU[j, j+1:k1])
+
+                if k1 == n:
+                    break
+
+                # 2. block row, L11 has a unit diagonal so there is nothing to divide by
+                for i in range(k0+1, k1):
+                    LU[i, k1:] -= LU[i, k0:i] @ LU[k0:i, k1:]
+
+                # 3. trailing matrix
+                L21, U12 = LU[k1:, k0:k1], LU[k0:k1, k1:]
+                if pool is None:
+                    LU[k1:, k1:] -= L21 @ U12
+                else:
+                    # the strips don't overlap, and numpy lets go of the GIL inside the products
+                    def update(columns):
+                        LU[k1:, columns] -= L21 @ LU[k0:k1, columns]
+                    bounds = np.linspace(k1, n, n_threads + 1).astype(int)
+                    list(pool.map(update, [slice(c0, c1) for c0, c1 in zip(bounds[:-1], bounds[1:]) if c1 > c0]))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return LU, perm
+
+    @staticmethod
+    def _factor_banded(A, pivot=True, minimize_roundoff=False):
+        """
+        LU of a CSRMatrix with lower/upper bandwidth (l, u), in O(n * l * (l + u)) time and O(n * (2l + u)) memory
+            row i is stored in a window of columns i-l, ..., i+u+l (pivoting can grow U's bandwidth up to u+l)
+            the multipliers are recorded against the original row they belong to and placed at the end,
+            which gives the same P @ A = L @ U as the dense factorization
+        """
+        n = A.shape[0]
+        l, u = A.bandwidth()
+        width = 2*l + u + 1
+
+        # band storage: S[i, c - i + l] = A[i, c], padded with zero rows so the last windows stay in bounds
+        S = np.zeros((n + l + 1, width))
+        S[A.row_indices, A.indices - A.row_indices + l] = A.data
+
+        # in the flat storage A[r, c] sits at r*(width-1) + c + l, so the rows j, ..., j+l and columns j, ..., j+u+l
+        # touched by column j form a strided view of S that we can update in place
+        flat = S.ravel()
+        itemsize = flat.itemsize
+        windows = np.lib.stride_tricks.as_strided(flat[l:], shape=(n, l + 1, u + l + 1),
+                                                  strides=(width * itemsize, (width - 1) * itemsize, itemsize))
+
+        perm = np.arange(n)
+        L_rows, L_cols, L_vals = [], [], []
+        for j in range(n):                  # iterating over columns, the last one only has its pivot checked
+            n_rows = min(l + 1, n - j)
+            block = windows[j]
+
+            # Checking for an all zero column
+            if not block[:, 0].any():
+                raise ValueError("An all-zero column appeared, which means A must be singular. Thus, the system has no solution.")
+
+            # same pivoting rule as the dense factorization
+            if minimize_roundoff or block[0, 0] == 0:
+
+                if not pivot:
+                    raise ValueError("There is a 0 on the main diagonal, which requires a pivot in order to decompose.")
+
+                p = np.argmax(np.abs(block[:, 0]))
+                if p != 0:
+                    block[[0, p]] = block[[p, 0]]
+                    perm[[j, j+p]] = perm[[j+p, j]]
+
+            # multipliers of column j, then a rank-1 update of the rest of the window
+            multipliers = block[1:n_rows, 0] / block[0, 0]
+            block[1:n_rows, 1:] -= multipliers[:, None] * block[0, 1:]
+            block[1:, 0] = 0
+
+            L_rows.append(perm[j+1:j+n_rows].copy())
+            L_cols.append(np.full(n_rows-1, j))
+            L_vals.append(multipliers)
+
+        # moving each multiplier to wherever its row ended up
+        position = np.empty(n, dtype=int)
+        position[perm] = np.arange(n)
+        L_rows = np.concatenate([position[np.concatenate(L_rows)], np.arange(n)])
+        L_cols = np.concatenate(L_cols + [np.arange(n)])
+        L_vals = np.concatenate(L_vals + [np.ones(n)])
+        L = CSRMatrix.from_coo(L_rows, L_cols, L_vals, (n, n))
+
+        U_rows = np.repeat(np.arange(n), width)
+        U_cols = U_rows + np.tile(np.arange(width), n) - l
+        inside = (U_cols >= 0) & (U_cols < n)
+        U = CSRMatrix.from_coo(U_rows[inside], U_cols[inside], S[:n].ravel()[inside], (n, n))
+
+        return L, U, perm
+
+    def _factor_sparse(self, A, pivot=True, minimize_roundoff=False):
+        l, u = A.bandwidth()
+
+        # a wide band (e.g. the corners of a periodic matrix) is no better than dense storage
+        if (2*l + u + 1) >= A.shape[0]:
+            LU, perm = self._factor_dense(A.toarray(), pivot=pivot, minimize_roundoff=minimize_roundoff)
+            L, U, P = self._unpack(LU, perm)
+            return SparseLUFactorization(CSRMatrix.from_dense(L), CSRMatrix.from_dense(U), perm)
+
+        L, U, perm = self._factor_banded(A, pivot=pivot, minimize_roundoff=minimize_roundoff)
+        return SparseLUFactorization(L, U, perm)
+
+    @staticmethod
+    def _unpack(LU, perm):
+        n = LU.shape[0]
+        L = np.tril(LU, k=-1) + np.identity(n)
+        U = np.triu(LU)
+        P = np.identity(n)[perm]
+        return L, U, P
+
+    def _decompose_trace(self, A, pivot=True, minimize_roundoff=False):
+        m, n = A.shape
+
         U = A.copy()
         L = np.identity(n)
         P = np.identity(n)
@@ -123,15 +493,67 @@ class LUDecomposition(LinearSystemSolver):
             if self.verbose and j != n-1:
                 print("-"*100)
 
+        # the loop stops before the last column, so its pivot hasn't been checked yet
+        if U[n-1, n-1] == 0:
+            raise ValueError("An all-zero column appeared, which means A must be singular. Thus, the system has no solution.")
+
         if self.verbose:
             print("\n")
-        
-        self.L = L
-        self.U = U
-        self.P = P
+
         return L, U, P
 
-    def solve(self, A, b, pivot, minimize_roundoff):
+    @staticmethod
+    def _cache_key(A, pivot, minimize_roundoff, dtype=float):
+        A = np.ascontiguousarray(A)
+        digest = hashlib.sha1(A.tobytes()).hexdigest()
+        return (A.shape, A.dtype.str, pivot, minimize_roundoff, np.dtype(dtype).str, digest)
+
+    def factor(self, A, pivot=True, minimize_roundoff=False, dtype=float):
+        """
+        Returns an LUFactorization of A which can be reused for any number of right-hand sides
+            dtype is the precision the factors are computed and stored in (sparse factors are always double)
+        """
+        if is_sparse(A):
+            return self._factor_sparse(A, pivot=pivot, minimize_roundoff=minimize_roundoff)
+
+        A = np.array(A)
+        m, n = A.shape
+        if m != n:
+            raise ValueError("A must be a square matrix.")
+
+        if self.cache_size > 0:
+            key = self._cache_key(A, pivot, minimize_roundoff, dtype)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        LU, perm = self._factor_dense(A, pivot=pivot, minimize_roundoff=minimize_roundoff, dtype=dtype)
+        factorization = LUFactorization(LU, perm)
+
+        if self.cache_size > 0:
+            self._cache[key] = factorization
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return factorization
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def solve(self, A, b, pivot, minimize_roundoff, refine=False):
+
+        # mixed precision: single precision factors take half the memory and bandwidth, and refinement restores double precision
+        if refine:
+            if not is_sparse(A):
+                A = np.array(A, dtype=float)
+            factorization = self.factor(A, pivot=pivot, minimize_roundoff=minimize_roundoff, dtype=np.float32)
+            x, self.refinement_steps, self.backward_error = factorization.refine(A, b, tol=self.refine_tol, max_iter=self.max_refinements)
+            if self.verbose:
+                print(f"{self.refinement_steps} refinement steps, backward error = {self.backward_error}")
+            return x
+
+        if not self.verbose or is_sparse(A):
+            return self.factor(A, pivot=pivot, minimize_roundoff=minimize_roundoff).solve(b)
 
         # obtaining L, U, and P such that L @ U = P @ A
         L, U, P = self.decompose(A, pivot=pivot,  minimize_roundoff=minimize_roundoff)
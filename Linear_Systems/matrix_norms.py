@@ -1,8 +1,157 @@
 import numpy as np
 
+from .sparse_matrix import is_sparse
+
+
 def frobenius_norm(A):
+    if is_sparse(A):
+        return np.linalg.norm(A.data)
     return np.linalg.norm(A)
 
 
-def condition_number(A):
-    return frobenius_norm(A) * frobenius_norm(np.linalg.inv(A))
\ No newline at end of file
+def one_norm(A):
+    # largest absolute column sum
+    if is_sparse(A):
+        return np.bincount(A.indices, weights=np.abs(A.data), minlength=A.shape[1]).max()
+    return np.abs(np.asarray(A, dtype=float)).sum(axis=0).max()
+
+
+def inf_norm(A):
+    # largest absolute row sum
+    if is_sparse(A):
+        return np.bincount(A.row_indices, weights=np.abs(A.data), minlength=A.shape[0]).max()
+    return np.abs(np.asarray(A, dtype=float)).sum(axis=1).max()
+
+
+def _power_iteration(apply, n, max_iter=100, tol=1e-6):
+    """
+    largest eigenvalue of the symmetric positive semi-definite operator x --> apply(x)
+        starts from a fixed random vector, ones can be orthogonal to the dominant eigenvector (e.g. alternating signs)
+    """
+    x = np.random.default_rng(0).standard_normal(n)
+    x /= np.linalg.norm(x)
+
+    lam = 0.0
+    for _ in range(max_iter):
+        y = apply(x)
+        lam, lam_old = np.linalg.norm(y), lam
+        if lam == 0:
+            break
+        x = y / lam
+        if abs(lam - lam_old) <= tol * lam:
+            break
+    return lam
+
+
+def two_norm(A, max_iter=100, tol=1e-6):
+    """
+    largest singular value of A, the square root of the largest eigenvalue of A.T @ A
+    """
+    if not is_sparse(A):
+        A = np.asarray(A, dtype=float)
+    return np.sqrt(_power_iteration(lambda x: A.T @ (A @ x), A.shape[1], max_iter=max_iter, tol=tol))
+
+
+def matrix_norm(A, p="fro"):
+    norms = {"fro": frobenius_norm, 1: one_norm, 2: two_norm, np.inf: inf_norm}
+    if p not in norms:
+        raise ValueError(f"p must be one of {tuple(norms)}. Currently {p}")
+    return norms[p](A)
+
+
+def estimate_inverse_one_norm(solve, solve_transpose, n, max_iter=5):
+    """
+    Hager's estimate of |A^(-1)|_1 (with Higham's refinements), using only solves with A and A.T
+        |A^(-1)|_1 is the max of |A^(-1) @ x|_1 over the unit ball of the 1-norm, a convex function maximized at some e_j,
+        so we climb along the gradient sign(A^(-1) @ x) @ A^(-1) from one e_j to the next until it stops going up
+    every step is one solve and one transpose solve, O(n^2) with the factors in hand, and it almost always stops within 2-3 steps
+    """
+    x = np.full(n, 1 / n)
+    estimate = 0.0
+    for k in range(max_iter):
+        y = solve(x)
+        new_estimate = np.abs(y).sum()
+        if k > 0 and new_estimate <= estimate:
+            break
+        estimate = new_estimate
+
+        # the gradient, the next e_j is where it is largest
+        z = solve_transpose(np.where(y >= 0, 1.0, -1.0))
+        j = np.argmax(np.abs(z))
+        if k > 0 and abs(z[j]) <= z @ x:
+            break
+        x = np.zeros(n)
+        x[j] = 1
+
+    # Higham's extra test vector, catches the matrices that fool the gradient steps
+    if n > 1:
+        i = np.arange(n)
+        b = (-1.0)**i * (1 + i / (n-1))
+        estimate = max(estimate, 2 * np.abs(solve(b)).sum() / (3 * n))
+    return estimate
+
+
+def inverse_norm(factorization, p=1):
+    """
+    estimate of |A^(-1)|_p from a factorization of A, anything with solve() and solve_transpose()
+    (e.g. an LUFactorization from LUDecomposition.factor or a QRFactorization from LeastSquaresFitting.factor)
+        p = 1      Hager's estimate
+        p = inf    |A^(-1)|_inf = |A^(-T)|_1, so the same estimate with the roles of the solves swapped
+        p = 2      inverse power iteration with A^(-1) @ A^(-T), for a rectangular QR that is the pseudo-inverse
+    """
+    n = factorization.n
+    if p == 1:
+        return estimate_inverse_one_norm(factorization.solve, factorization.solve_transpose, n)
+    if p == np.inf:
+        return estimate_inverse_one_norm(factorization.solve_transpose, factorization.solve, n)
+    if p == 2:
+        return np.sqrt(_power_iteration(lambda x: factorization.solve(factorization.solve_transpose(x)), n))
+    raise ValueError(f"p must be one of (1, 2, inf). Currently {p}")
+
+
+def condition_number(A, p="fro", factorization=None):
+    """
+    cond_p(A) = |A|_p * |A^(-1)|_p
+        p = 1, 2, inf   estimated from the factors in O(n^2) (a few solves), good to within a small factor,
+                        which is all we need to know how many digits a solve will lose
+        p = "fro"       the default, and the only exact one, |A^(-1)|_F needs all n columns of A^(-1), so it costs O(n^3)
+                        even with the factors (and n^2 more memory), there is no cheap estimate of it to fall back on
+    factorization is an LU or QR factorization of A to reuse, otherwise A is factored here, a square A with a pivoted LU
+    and a non-square one with QR (of A.T when A is wide, which has the same singular values)
+    (a non-square A only has a 2-norm condition number, and a Frobenius one through its pseudo-inverse)
+    """
+    if not is_sparse(A):
+        A = np.asarray(A, dtype=float)
+    m, n = A.shape
+
+    if m != n and p not in (2, "fro"):
+        raise ValueError("A non-square A only has a 2-norm condition number.")
+
+    if factorization is None:
+        if m == n:
+            # without pivoting a tiny leading pivot would make the factors, and so the estimate, meaningless
+            from .lu_decomposition import LUDecomposition
+            factorization = LUDecomposition().factor(A, minimize_roundoff=True)
+        else:
+            from .least_squares_fitting import LeastSquaresFitting
+            dense = A.toarray() if is_sparse(A) else A
+            factorization = LeastSquaresFitting().factor(dense if m > n else dense.T)
+
+    if p == "fro":
+        inverse = factorization.solve(np.identity(factorization.m if m != n else m))
+        return frobenius_norm(A) * frobenius_norm(inverse)
+
+    return matrix_norm(A, p) * inverse_norm(factorization, p)
+
+
+if __name__ == "__main__":
+
+    from .sparse_matrix import CSRMatrix
+    from .lu_decomposition import LUDecomposition
+
+    A = CSRMatrix.from_diagonals(100, (1, -2, 1)).toarray()
+    LU = LUDecomposition().factor(A)
+
+    # only "fro" (the default) is computed exactly, the rest are estimates
+    for p in ("fro", 1, 2, np.inf):
+        print(f"p = {p}: condition_number = {condition_number(A, p=p, factorization=LU)}, np.linalg.cond = {np.linalg.cond(A, p=p)}")
@@ -0,0 +1,121 @@
+import numpy as np
+
+from .linear_system_solver import LinearSystemSolver
+from .sparse_matrix import CSRMatrix, is_sparse
+
+class Preconditioner(object):
+    """
+    An approximation M of A that is cheap to solve with
+        calling the preconditioner gives r --> M^(-1) @ r
+    they are built from the same A = L + D + U split as the relaxation methods
+    """
+
+    def __init__(self, A):
+        self.A = A if is_sparse(A) else np.array(A, dtype=float)
+        self.L, self.D, self.U = self.split(self.A)
+        self.d = self.A.diagonal() if is_sparse(self.A) else np.diag(self.A)
+
+        if np.any(self.d == 0):
+            raise ValueError("A must have a nonzero diagonal.")
+
+    @staticmethod
+    def split(A):
+        """
+        A = L + D + U, the strictly lower triangular, diagonal and strictly upper triangular parts
+        """
+        if is_sparse(A):
+            return A.tril(k=-1), CSRMatrix.from_diagonal(A.diagonal()), A.triu(k=1)
+        return np.tril(A, k=-1), np.diag(np.diag(A)), np.triu(A, k=1)
+
+    def __call__(self, r):
+        raise NotImplementedError("__call__() function not yet implemented.")
+
+
+class JacobiPreconditioner(Preconditioner):
+    """
+    M = D
+    """
+
+    def __call__(self, r):
+        return (np.asarray(r).T / self.d).T
+
+
+class SSORPreconditioner(Preconditioner):
+    """
+    M = w/(2-w) * (D/w + L) @ (D/w)^(-1) @ (D/w + U)
+        one forward and one backward SOR sweep, which keeps M symmetric when A is (so it works with CG)
+    """
+
+    def __init__(self, A, w=1):
+        super(SSORPreconditioner, self).__init__(A)
+        if not 0 < w < 2:
+            raise ValueError(f"w must be between 0 and 2. Currently {w}")
+
+        self.w = w
+        self.lower = self.D / w + self.L
+        self.upper = self.D / w + self.U
+
+    def __call__(self, r):
+        y = LinearSystemSolver.forward_substitution(self.lower, r)
+        y = (y.T * self.d / self.w).T
+        return (2 - self.w) / self.w * LinearSystemSolver.backward_substitution(self.upper, y)
+
+
+class ILUPreconditioner(Preconditioner):
+    """
+    M = L @ U, the LU factorization of A with every entry outside the sparsity pattern of A thrown away (ILU(0))
+        so the factors take no more memory than A does
+    """
+
+    def __init__(self, A):
+        super(ILUPreconditioner, self).__init__(A)
+
+        LU = self._ilu0(self.A if is_sparse(self.A) else CSRMatrix.from_dense(self.A))
+        self.lower = LU.tril(k=-1) + CSRMatrix.identity(LU.shape[0])
+        self.upper = LU.triu(k=0)
+
+    @staticmethod
+    def _ilu0(A):
+        n = A.shape[0]
+
+        # python lists are much faster than numpy for this row by row loop
+        indptr, indices, data = A.indptr.tolist(), A.indices.tolist(), A.data.tolist()
+        diagonal = [None] * n
+
+        for i in range(n):
+            position = {j: t for t, j in enumerate(indices[indptr[i]:indptr[i+1]], indptr[i])}
+
+            # eliminating with every earlier row k, but only where row i already has an entry
+            for t in range(indptr[i], indptr[i+1]):
+                k = indices[t]
+                if k >= i:
+                    break
+                data[t] /= data[diagonal[k]]
+                for s in range(diagonal[k] + 1, indptr[k+1]):
+                    q = position.get(indices[s])
+                    if q is not None:
+                        data[q] -= data[t] * data[s]
+
+            diagonal[i] = position.get(i)
+            if diagonal[i] is None or data[diagonal[i]] == 0:
+                raise ValueError(f"A zero pivot appeared in row {i}, ILU(0) doesn't exist for this A.")
+
+        return CSRMatrix(data, indices, indptr, A.shape)
+
+    def __call__(self, r):
+        y = LinearSystemSolver.forward_substitution(self.lower, r)
+        return LinearSystemSolver.backward_substitution(self.upper, y)
+
+
+if __name__ == "__main__":
+
+    # the same stencil in both directions of a 4 x 4 grid (like ClassicalRelaxation.B_2d)
+    T = CSRMatrix.from_diagonals(4, (-1, 4, -1))
+    I = CSRMatrix.identity(4)
+    A = CSRMatrix.kron(I, T) + CSRMatrix.kron(T, I)
+    r = np.ones(16)
+
+    for M in (JacobiPreconditioner(A), SSORPreconditioner(A, w=1.5), ILUPreconditioner(A)):
+        z = M(r)
+        print(type(M).__name__)
+        print("\t|A @ M^(-1) @ r - r| / |r| =", np.linalg.norm(A @ z - r) / np.linalg.norm(r))
@@ -0,0 +1,273 @@
+import numpy as np
+
+
+def is_sparse(A):
+    return isinstance(A, CSRMatrix)
+
+
+class CSRMatrix(object):
+    """
+    Compressed Sparse Row storage
+        data[indptr[i]:indptr[i+1]]    = nonzero values of row i
+        indices[indptr[i]:indptr[i+1]] = their column indices (ascending)
+    so a product with a vector costs O(nnz) instead of O(m * n)
+    """
+
+    ndim = 2
+
+    # stops numpy from treating us as a scalar in ndarray + CSRMatrix, so our reflected operators get used
+    __array_ufunc__ = None
+
+    def __init__(self, data, indices, indptr, shape):
+        self.data = np.asarray(data, dtype=float)
+        self.indices = np.asarray(indices, dtype=int)
+        self.indptr = np.asarray(indptr, dtype=int)
+        self.shape = tuple(shape)
+        self._rows = None
+
+        if len(self.indptr) != self.shape[0] + 1:
+            raise ValueError(f"indptr must have length {self.shape[0] + 1}. Currently {len(self.indptr)}")
+        if len(self.data) != len(self.indices):
+            raise ValueError(f"data and indices must be the same length ({len(self.data)} != {len(self.indices)})")
+
+    """ Construction """
+    @classmethod
+    def from_coo(cls, rows, cols, vals, shape):
+        """
+        builds the matrix from (row, column, value) triplets, duplicates are summed and zeros dropped
+        """
+        rows = np.asarray(rows, dtype=int)
+        cols = np.asarray(cols, dtype=int)
+        vals = np.asarray(vals, dtype=float)
+        m, n = shape
+
+        # sort by row, then by column, and sum duplicates
+        keys = rows * n + cols
+        keys, inverse = np.unique(keys, return_inverse=True)
+        vals = np.bincount(inverse.ravel(), weights=vals, minlength=len(keys))
+
+        keep = vals != 0
+        keys, vals = keys[keep], vals[keep]
+        rows, cols = keys // n, keys % n
+
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=m))))
+        return cls(vals, cols, indptr, shape)
+
+    @classmethod
+    def from_dense(cls, A):
+        A = np.asarray(A, dtype=float)
+        rows, cols = np.nonzero(A)
+        return cls.from_coo(rows, cols, A[rows, cols], A.shape)
+
+    @classmethod
+    def from_diagonals(cls, M, diag, p=False):
+        """
+        same layout as ClassicalRelaxation.B
+            diag = (d_-h, ..., d_0, ..., d_h) are the values on the diagonals -h, ..., h
+            p = True wraps the diagonals around (periodic)
+        """
+        half = len(diag) // 2
+
+        rows, cols, vals = [], [], []
+        for k, d in enumerate(diag, -1 * half):
+            if p:
+                i = np.arange(M)
+                j = (i + k) % M
+            else:
+                i = np.arange(max(0, -k), min(M, M - k))
+                j = i + k
+            rows.append(i)
+            cols.append(j)
+            vals.append(np.full(len(i), d, dtype=float))
+
+        return cls.from_coo(np.concatenate(rows), np.concatenate(cols), np.concatenate(vals), (M, M))
+
+    @classmethod
+    def kron(cls, A, B):
+        """
+        Kronecker product, block (i, j) of the result is A[i, j] * B
+            e.g. the 2-D Laplacian on an M x M grid is kron(I, T) + kron(T, I)
+        """
+        A = A if is_sparse(A) else cls.from_dense(A)
+        B = B if is_sparse(B) else cls.from_dense(B)
+
+        rows = np.add.outer(A.row_indices * B.shape[0], B.row_indices).ravel()
+        cols = np.add.outer(A.indices * B.shape[1], B.indices).ravel()
+        vals = np.outer(A.data, B.data).ravel()
+        return cls.from_coo(rows, cols, vals, (A.shape[0] * B.shape[0], A.shape[1] * B.shape[1]))
+
+    @classmethod
+    def identity(cls, n):
+        return cls.from_diagonal(np.ones(n))
+
+    @classmethod
+    def from_diagonal(cls, d):
+        n = len(d)
+        return cls.from_coo(np.arange(n), np.arange(n), d, (n, n))
+
+    def toarray(self):
+        A = np.zeros(self.shape)
+        A[self.row_indices, self.indices] = self.data
+        return A
+
+    def copy(self):
+        return CSRMatrix(self.data.copy(), self.indices.copy(), self.indptr.copy(), self.shape)
+
+    """ Properties """
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @property
+    def row_indices(self):
+        # the row of every stored value, the "expanded" version of indptr
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return self._rows
+
+    @property
+    def T(self):
+        return CSRMatrix.from_coo(self.indices, self.row_indices, self.data, self.shape[::-1])
+
+    def row(self, i):
+        a, b = self.indptr[i], self.indptr[i+1]
+        return self.indices[a:b], self.data[a:b]
+
+    def take_rows(self, rows):
+        """
+        the len(rows) x n matrix made of the given rows, in the given order
+        """
+        rows = np.asarray(rows, dtype=int)
+        counts = np.diff(self.indptr)[rows]
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+
+        # where the stored values of every selected row start, shifted to line up with the new indptr
+        positions = np.repeat(self.indptr[rows] - indptr[:-1], counts) + np.arange(indptr[-1])
+        return CSRMatrix(self.data[positions], self.indices[positions], indptr, (len(rows), self.shape[1]))
+
+    def diagonal(self):
+        d = np.zeros(min(self.shape))
+        on_diag = self.row_indices == self.indices
+        d[self.indices[on_diag]] = self.data[on_diag]
+        return d
+
+    def bandwidth(self):
+        """
+        (lower, upper) bandwidth, i.e. A[i, j] = 0 for j < i - lower or j > i + upper
+        """
+        if self.nnz == 0:
+            return 0, 0
+        offsets = self.indices - self.row_indices
+        return max(0, -int(offsets.min())), max(0, int(offsets.max()))
+
+    """ Structure """
+    def _filter(self, keep):
+        return CSRMatrix.from_coo(self.row_indices[keep], self.indices[keep], self.data[keep], self.shape)
+
+    def tril(self, k=0):
+        return self._filter(self.indices - self.row_indices <= k)
+
+    def triu(self, k=0):
+        return self._filter(self.indices - self.row_indices >= k)
+
+    """ Arithmetic """
+    def __matmul__(self, X):
+        if is_sparse(X):
+            return self._matmul_sparse(X)
+
+        X = np.asarray(X, dtype=float)
+        if X.shape[0] != self.shape[1]:
+            raise ValueError(f"Dimension mismatch: {self.shape} @ {X.shape}")
+
+        # reduceat is slow over a block of columns, when the rows are short it's faster to go one stored value per row at a time
+        counts = np.diff(self.indptr)
+        if X.ndim == 2 and self.nnz > 0 and counts.max() <= 16:
+            out = np.zeros((self.shape[0], X.shape[1]))
+            for s in range(counts.max()):
+                rows = np.flatnonzero(counts > s)
+                positions = self.indptr[rows] + s
+                products = self.data[positions, None] * X[self.indices[positions]]
+                if len(rows) == self.shape[0]:
+                    out += products
+                else:
+                    out[rows] += products
+            return out
+
+        # every stored value times the entry of X it multiplies, then summed along each row
+        products = (self.data * X[self.indices].T).T
+        out = np.zeros((self.shape[0],) + X.shape[1:])
+
+        # reduceat misbehaves on empty rows, so we skip them
+        nonempty = np.diff(self.indptr) > 0
+        if np.any(nonempty):
+            out[nonempty] = np.add.reduceat(products, self.indptr[:-1][nonempty], axis=0)
+        return out
+
+    def _matmul_sparse(self, B):
+        if B.shape[0] != self.shape[1]:
+            raise ValueError(f"Dimension mismatch: {self.shape} @ {B.shape}")
+
+        # every stored A[i, k] meets every stored value of row k of B
+        counts = np.diff(B.indptr)[self.indices]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        positions = np.repeat(B.indptr[self.indices] - offsets, counts) + np.arange(counts.sum())
+
+        rows = np.repeat(self.row_indices, counts)
+        vals = np.repeat(self.data, counts) * B.data[positions]
+        return CSRMatrix.from_coo(rows, B.indices[positions], vals, (self.shape[0], B.shape[1]))
+
+    def dot(self, X):
+        return self @ X
+
+    def __mul__(self, a):
+        if not np.isscalar(a):
+            raise TypeError("CSRMatrix only supports multiplication by a scalar, use @ for matrix products.")
+        return CSRMatrix(a * self.data, self.indices.copy(), self.indptr.copy(), self.shape)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, a):
+        return self * (1 / a)
+
+    def __neg__(self):
+        return self * -1
+
+    def __add__(self, other):
+        if not is_sparse(other):
+            return self.toarray() + other
+        if other.shape != self.shape:
+            raise ValueError(f"Dimension mismatch: {self.shape} + {other.shape}")
+        return CSRMatrix.from_coo(
+                np.concatenate((self.row_indices, other.row_indices)),
+                np.concatenate((self.indices, other.indices)),
+                np.concatenate((self.data, other.data)),
+                self.shape
+            )
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __repr__(self):
+        return f"CSRMatrix(shape={self.shape}, nnz={self.nnz})"
+
+    def __str__(self):
+        # small matrices are easier to read densely
+        if self.shape[0] * self.shape[1] <= 400:
+            return str(self.toarray())
+        return repr(self)
+
+
+if __name__ == "__main__":
+
+    A = CSRMatrix.from_diagonals(6, (1, -2, 1), p=True)
+
+    print(A)
+    print()
+    print("nnz =", A.nnz)
+    print("bandwidth =", A.bandwidth())
+    print("A @ 1 =", A @ np.ones(6))
@@ -0,0 +1,155 @@
+import numpy as np
+from collections import deque
+
+from .linear_system_solver import LinearSystemSolver
+from .least_squares_fitting import GivensQR
+
+class StreamingLeastSquares(LinearSystemSolver):
+    """
+    Least squares fitting for rows that arrive over time
+        only the (n+1) x (n+1) triangular factor of the augmented matrix [A | b] is kept
+            [ R  d   ]
+            [ 0  rho ]
+        where R is the usual R factor, d = Q.T @ b and |rho| is the norm of the residual
+
+    window = None keeps every row in the fit
+    window = k only fits the last k rows, the older rows are removed with a downdate
+        (this needs the last k rows to be buffered, so memory is O(n^2 + k*n))
+    """
+
+    def __init__(self, n, window=None, verbose=False):
+        super(StreamingLeastSquares, self).__init__(verbose=verbose)
+        self.n = n
+        self.window = window
+        self.reset()
+
+    def __call__(self, A, b):
+        self.append(A, b)
+        return self.solve()
+
+    def reset(self):
+        self.Rb = np.zeros((self.n+1, self.n+1))
+        self.count = 0
+        self._buffer = deque()
+
+    @property
+    def R(self):
+        return self.Rb[:self.n, :self.n]
+
+    @property
+    def d(self):
+        return self.Rb[:self.n, self.n]
+
+    @property
+    def residual_norm(self):
+        return np.abs(self.Rb[self.n, self.n])
+
+    def _augment(self, A, b):
+        A = np.array(A, dtype=float, ndmin=2)
+        b = np.array(b, dtype=float, ndmin=1)
+
+        if A.shape[1] != self.n:
+            raise ValueError(f"A must have {self.n} columns. Currently {A.shape[1]}")
+        if A.shape[0] != b.shape[0]:
+            raise ValueError(f"A and b must have the same number of rows ({A.shape[0]} != {b.shape[0]})")
+
+        return np.column_stack((A, b))
+
+    def append(self, A, b):
+        """
+        absorbs a chunk of rows A @ x = b into the factorization
+        """
+        Ab = self._augment(A, b)
+
+        for c in range(self.n+1):              # iterating over columns
+
+            # only row c of R and the new rows have anything in column c
+            x = np.concatenate(([self.Rb[c, c]], Ab[:, c]))
+            nonzero = np.flatnonzero(x)
+            if len(nonzero) == 0 or nonzero[-1] == 0:
+                continue
+
+            # same cascade of rotations GivensQR uses, applied to [R[c]; new rows]
+            end = nonzero[-1] + 1
+            x, rho = GivensQR._cascade(x[:end])
+            block = np.vstack((self.Rb[c, c:], Ab[:end-1, c:]))
+            block = GivensQR._apply_cascade(block, x, rho)
+
+            self.Rb[c, c:] = block[0]
+            Ab[:end-1, c:] = block[1:]
+            Ab[:end-1, c] = 0
+
+        self.count += len(Ab)
+
+        if self.window is not None:
+            self._buffer.extend(self._augment(A, b))
+            while len(self._buffer) > self.window:
+                self._downdate(self._buffer.popleft())
+
+    def remove(self, A, b):
+        """
+        removes a chunk of rows A @ x = b that were previously appended
+        """
+        for z in self._augment(A, b):
+            self._downdate(z)
+
+    def _downdate(self, z):
+        """
+        finds the new factor with Rb.T @ Rb - z.T @ z (LINPACK's dchdd)
+        """
+        # solving R.T @ p = a for p, where z = [a, beta]
+        p = self.forward_substitution(self.Rb[:-1, :-1].T, z[:-1])
+        if not np.all(np.isfinite(p)):
+            raise ValueError("R is singular, so the row cannot be removed.")
+
+        # the last row of Rb.T only involves rho, so we handle it on its own to allow rho = 0
+        rho = self.residual_norm
+        r = z[-1] - self.Rb[:-1, -1] @ p
+        alpha2 = 1 - p @ p
+        if alpha2 <= 0:
+            raise ValueError("Removing this row would leave a rank-deficient system.")
+
+        # rotations that zero p from the bottom up into alpha
+        alpha = np.sqrt(alpha2)
+        C = np.zeros(self.n)
+        S = np.zeros(self.n)
+        for i in reversed(range(self.n)):
+            C[i] = alpha / np.hypot(alpha, p[i])
+            S[i] = p[i] / np.hypot(alpha, p[i])
+            alpha = np.hypot(alpha, p[i])
+
+        # applying the rotations to the rows of [R | d]
+        #   the rotation that folds p_n = r / rho into alpha leaves r / sqrt(alpha2) behind in the d column
+        xx = np.zeros(self.n+1)
+        xx[-1] = r / np.sqrt(alpha2)
+        for i in reversed(range(self.n)):
+            t = self.Rb[i, i:].copy()
+            self.Rb[i, i:] = C[i] * t - S[i] * xx[i:]
+            xx[i:] = S[i] * t + C[i] * xx[i:]
+
+        # the removed row had residual r under the old fit, which takes r^2 / (1 - |p|^2) out of rho^2
+        self.Rb[-1, -1] = np.sqrt(max(rho**2 - r**2 / alpha2, 0))
+        self.count -= 1
+
+    def solve(self):
+        if self.count < self.n or np.any(np.diag(self.R) == 0):
+            raise ValueError("Not enough independent rows have been seen to determine x.")
+
+        # solving R @ x = d for x
+        return self.backward_substitution(self.R, self.d)
+
+
+if __name__ == "__main__":
+
+    rng = np.random.default_rng(0)
+    x_true = np.array([1, -2, 3])
+
+    solver = StreamingLeastSquares(3, verbose=True)
+    for k in range(10):
+        A = rng.standard_normal((100, 3))
+        b = A @ x_true + 0.01 * rng.standard_normal(100)
+        x = solver(A, b)
+
+    print("rows seen:", solver.count)
+    print("x =", x)
+    print("|A @ x - b| =", solver.residual_norm)
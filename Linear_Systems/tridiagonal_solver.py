@@ -0,0 +1,203 @@
+import numpy as np
+
+from .linear_system_solver import LinearSystemSolver
+from .sparse_matrix import is_sparse
+
+class TridiagonalSolver(LinearSystemSolver):
+    """
+    O(n) solver for tridiagonal systems
+        [ b0  c0              beta ]
+        [ a1  b1  c1               ]
+        [     a2  b2  c2           ]
+        [          ...  ...  ...   ]
+        [ alpha          a_n  b_n  ]
+    the corners alpha and beta are only nonzero for periodic (cyclic) systems, e.g. ClassicalRelaxation.B(M, (a, b, c), p=True)
+    """
+
+    def __init__(self, verbose=False):
+        super(TridiagonalSolver, self).__init__(verbose=verbose)
+
+    def __call__(self, A, b):
+        return self.solve(A=A, b=b)
+
+    @staticmethod
+    def diagonals(A):
+        """
+        returns (a, b, c, alpha, beta) where a, b, c are the sub, main and super diagonals padded to length n
+        """
+        n = A.shape[0]
+        a = np.zeros(n)
+        c = np.zeros(n)
+
+        if is_sparse(A):
+            rows, cols, vals = A.row_indices, A.indices, A.data
+        else:
+            A = np.asarray(A, dtype=float)
+            rows, cols = np.nonzero(A)
+            vals = A[rows, cols]
+
+        offsets = cols - rows
+        b = np.zeros(n)
+        b[rows[offsets == 0]] = vals[offsets == 0]
+        a[rows[offsets == -1]] = vals[offsets == -1]
+        c[rows[offsets == 1]] = vals[offsets == 1]
+
+        alpha = vals[(rows == n-1) & (cols == 0)].sum() if n > 2 else 0.0
+        beta = vals[(rows == 0) & (cols == n-1)].sum() if n > 2 else 0.0
+
+        # anything else means A isn't (cyclic) tridiagonal
+        corner = ((rows == n-1) & (cols == 0)) | ((rows == 0) & (cols == n-1))
+        if np.any((np.abs(offsets) > 1) & ~corner):
+            raise ValueError("A must be a tridiagonal (or cyclic tridiagonal) matrix.")
+
+        return a, b, c, alpha, beta
+
+    @staticmethod
+    def is_tridiagonal(A):
+        try:
+            TridiagonalSolver.diagonals(A)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _is_stable(a, b, c, alpha=0.0, beta=0.0):
+        """
+        whether eliminating without pivoting (the Thomas algorithm) is safe, which we know when either
+            A is strictly diagonally dominant by rows, |b_i| > |a_i| + |c_i| (counting the corners), or
+            A is symmetric and definite (positive or negative), i.e. all the pivots b_i - a_i^2 / m_(i-1) have the same sign
+        otherwise a tiny pivot can ruin the solution without ever being exactly 0, so A needs a pivoted LU instead
+        """
+        off_diagonal = np.abs(a) + np.abs(c)
+        off_diagonal[-1] += abs(alpha)
+        off_diagonal[0] += abs(beta)
+        if np.all(np.abs(b) > off_diagonal):
+            return True
+
+        # the pivots of the cyclic system aren't those of its tridiagonal part, so only dominance counts there
+        if alpha != 0 or beta != 0 or not np.array_equal(a[1:], c[:-1]):
+            return False
+
+        a, b = np.asarray(a, dtype=float).tolist(), np.asarray(b, dtype=float).tolist()
+        m = b[0]
+        sign = np.sign(m)
+        for i in range(1, len(b)):
+            if np.sign(m) != sign or m == 0:
+                return False
+            m = b[i] - a[i]**2 / m
+        return np.sign(m) == sign and m != 0
+
+    @staticmethod
+    def is_stable(A):
+        """
+        whether A is (cyclic) tridiagonal and can be solved without pivoting, see _is_stable
+        """
+        try:
+            a, b, c, alpha, beta = TridiagonalSolver.diagonals(A)
+        except ValueError:
+            return False
+        return TridiagonalSolver._is_stable(a, b, c, alpha, beta)
+
+    @staticmethod
+    def thomas(a, b, c, d):
+        """
+        solving the tridiagonal system with sub diagonal a (a[0] unused), main diagonal b and super diagonal c (c[-1] unused)
+            d can be a vector or an (n, k) block of right-hand sides, which all share one elimination sweep
+        """
+        d = np.asarray(d, dtype=float)
+        n = len(b)
+
+        # the modified super diagonal only depends on A, so it is computed once for every column of d
+        a, b, c = (np.asarray(v, dtype=float).tolist() for v in (a, b, c))
+        cp = [0.0] * n
+        m = [0.0] * n
+        for i in range(n):
+            m[i] = b[i] - (a[i] * cp[i-1] if i > 0 else 0.0)
+            if m[i] == 0:
+                raise ValueError("A zero pivot appeared, the Thomas algorithm requires A to be non-singular without pivoting (e.g. diagonally dominant).")
+            cp[i] = c[i] / m[i]
+
+        # a single right-hand side is faster with plain python floats
+        if d.ndim == 1:
+            dp = d.tolist()
+            dp[0] = dp[0] / m[0]
+            for i in range(1, n):
+                dp[i] = (dp[i] - a[i] * dp[i-1]) / m[i]
+            for i in reversed(range(n-1)):
+                dp[i] = dp[i] - cp[i] * dp[i+1]
+            return np.array(dp)
+
+        x = d.copy()
+        x[0] = x[0] / m[0]
+        for i in range(1, n):
+            x[i] = (x[i] - a[i] * x[i-1]) / m[i]
+        for i in reversed(range(n-1)):
+            x[i] -= cp[i] * x[i+1]
+        return x
+
+    @staticmethod
+    def cyclic(a, b, c, d, alpha, beta):
+        """
+        solving the cyclic tridiagonal system with corners alpha = A[n-1, 0] and beta = A[0, n-1]
+            A = A' + u @ v.T, where A' is tridiagonal, so Sherman-Morrison only needs two Thomas solves with A'
+        """
+        d = np.asarray(d, dtype=float)
+        n = len(b)
+
+        # gamma is arbitrary, -b0 avoids cancellation in the first pivot
+        gamma = -b[0] if b[0] != 0 else 1.0
+        bb = np.array(b, dtype=float)
+        bb[0] -= gamma
+        bb[-1] -= alpha * beta / gamma
+
+        u = np.zeros(n)
+        u[0], u[-1] = gamma, alpha
+
+        # a block of right-hand sides shares one elimination sweep with u,
+        # a single one is faster as two python-float sweeps
+        if d.ndim == 1:
+            x = TridiagonalSolver.thomas(a, bb, c, d)[:, None]
+            z = TridiagonalSolver.thomas(a, bb, c, u)
+        else:
+            solution = TridiagonalSolver.thomas(a, bb, c, np.column_stack((d, u)))
+            x, z = solution[:, :-1], solution[:, -1]
+
+        factor = (x[0] + beta * x[-1] / gamma) / (1 + z[0] + beta * z[-1] / gamma)
+        x = x - np.outer(z, factor)
+
+        return x.reshape(d.shape)
+
+    def solve(self, A, b):
+        if A.shape[0] != A.shape[1]:
+            raise ValueError("A must be a square matrix.")
+
+        a, d, c, alpha, beta = self.diagonals(A)
+
+        if self.verbose:
+            print("sub diagonal:  ", a[1:])
+            print("main diagonal: ", d)
+            print("super diagonal:", c[:-1])
+            if alpha != 0 or beta != 0:
+                print(f"corners:        alpha = {alpha}, beta = {beta}")
+            print()
+
+        if alpha == 0 and beta == 0:
+            return self.thomas(a, d, c, b)
+        return self.cyclic(a, d, c, b, alpha, beta)
+
+
+if __name__ == "__main__":
+
+    from .sparse_matrix import CSRMatrix
+
+    solver = TridiagonalSolver(verbose=True)
+
+    A = CSRMatrix.from_diagonals(6, (1, -3, 1), p=True)
+    b = np.arange(6)
+
+    print(A)
+    print()
+
+    x = solver(A, b)
+    print("x =", x)
+    print("A @ x =", A @ x)
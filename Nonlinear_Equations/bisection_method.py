@@ -7,12 +7,12 @@ class BisectionMethod(NonlinearScalarSystemSolver):
 
     name = "Bisection Method"
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
-        super(BisectionMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
+        super(BisectionMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
 
     def __call__(self, f, a=-10, b=10):
         self.f = f
-        self.iterations = []
+        self.iterations = self._new_history()
         return self.solve(f=f, a=a, b=b)
 
     def solve(self, f, a, b):
@@ -20,17 +20,21 @@ class BisectionMethod(NonlinearScalarSystemSolver):
         if a >= b:
             raise ValueError("a must be strictly less than b")
         
-        if f(a) * f(b) >= 0:
+        # f(x) is only evaluated once per midpoint, f_a and f_x carry the values we need over
+        f_a, f_x = f(a), f(b)
+        if f_a * f_x >= 0:
             raise ValueError("f(a) * f(b) must be less than 0")
 
-        # initialization
+        # initialization, the starting bracket is kept apart since the history may not keep it
         x = b
-        self.iterations.append( (a, b) )
+        self.bracket = (a, b)
+        self.iterations.append( (a, b), residual=np.abs(f_x) )
 
         k = 0
-        while np.abs(f(x)) > self.tol and k < self.max_iter:
+        while np.abs(f_x) > self.tol and k < self.max_iter:
             
             x = (a + b) / 2
+            f_x = f(x)
             k += 1
 
             if self.verbose:
@@ -38,9 +42,9 @@ class BisectionMethod(NonlinearScalarSystemSolver):
                 print(f"\t[a, b] = [{a}, {b}]")
                 print(f"\tx = {x}")
                 print()
-                print(f"\tf(a) * f(x) = {f(a)} * {f(x)} = {f(a) * f(x)}", end="")
+                print(f"\tf(a) * f(x) = {f_a} * {f_x} = {f_a * f_x}", end="")
 
-            if f(a) * f(x) < 0:
+            if f_a * f_x < 0:
                 b = x
                 if self.verbose:
                     print(" < 0")
@@ -50,18 +54,19 @@ class BisectionMethod(NonlinearScalarSystemSolver):
                     print(" > 0")
                     print(f"\tx --> a")
                 a = x
+                f_a = f_x
 
-            self.iterations.append( (a, b) )
+            self.iterations.append( (a, b), residual=np.abs(f_x) )
             if self.verbose:
                 print()
         
         if self.verbose:
-            print(f"f({x}) = {f(x)}")
+            print(f"f({x}) = {f_x}")
         return x
 
     def annotate_plot(self):
 
-        x = self.iterations[0][0]
+        x = self.bracket[0]
         plt.vlines(x, 0, self.f(x), color="red")
 
         for k, (ak, bk) in enumerate(self.iterations, 1):
@@ -7,8 +7,8 @@ class GeneralizedNewtonMethod(NonlinearSystemSolver):
 
     name = "Generalized Newton's Method"
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
-        super(GeneralizedNewtonMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
+        super(GeneralizedNewtonMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
 
     def __call__(self, f, df, ddf, X0):
         if df is None or ddf is None:
@@ -17,7 +17,7 @@ class GeneralizedNewtonMethod(NonlinearSystemSolver):
         self.f = f
         self.df = df
         self.ddf = ddf
-        self.iterations = []
+        self.iterations = self._new_history()
         return self.solve(f=f, df=df, ddf=ddf, X0=X0)
 
     def solve(self, f, df, ddf, X0):
@@ -46,7 +46,7 @@ class GeneralizedNewtonMethod(NonlinearSystemSolver):
                 print("\n")
             
             X += dX
-            self.iterations.append(X.copy())
+            self.iterations.append(X, residual=np.linalg.norm(dX))
 
         if self.verbose:
             print(f"f({X}) = {f(X)}")
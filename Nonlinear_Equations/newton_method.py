@@ -7,8 +7,8 @@ class NewtonMethod(NonlinearScalarSystemSolver):
 
     name = "Newton's Method"
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
-        super(NewtonMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
+        super(NewtonMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
 
     def __call__(self, f, df=None, x0=0):
         if df is None:
@@ -16,20 +16,20 @@ class NewtonMethod(NonlinearScalarSystemSolver):
         
         self.f = f
         self.df = df
-        self.iterations = []
+        self.iterations = self._new_history()
         return self.solve(f=f, df=df, x0=x0)
 
     def solve(self, f, df, x0):
 
-        # initialization
+        # initialization, f(x) is only evaluated once per iterate
         x = x0
-        self.iterations.append(x)
+        f_k = f(x)
+        self.iterations.append(x, residual=np.abs(f_k))
 
         k = 0
-        while np.abs(f(x)) > self.tol and k < self.max_iter:
+        while np.abs(f_k) > self.tol and k < self.max_iter:
             k += 1
 
-            f_k = f(x)
             df_k = df(x)
             x_k = x - f_k / df_k
             if self.verbose:
@@ -38,10 +38,11 @@ class NewtonMethod(NonlinearScalarSystemSolver):
                 print()
             
             x = x_k
-            self.iterations.append(x)
+            f_k = f(x)
+            self.iterations.append(x, residual=np.abs(f_k))
 
         if self.verbose:
-            print(f"f({x}) = {f(x)}")
+            print(f"f({x}) = {f_k}")
         return x
     
     def annotate_plot(self):
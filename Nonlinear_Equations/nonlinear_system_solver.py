@@ -1,13 +1,22 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from iteration_history import IterationHistory
+
 class NonlinearSystemSolver(object):
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
         self.tol = tol
         self.max_iter = max_iter
         self.verbose = verbose
-        self.iterations = []
+
+        # what to keep in self.iterations, see IterationHistory for the policies
+        self.history = history
+        self.history_size = history_size
+        self.iterations = self._new_history()
+
+    def _new_history(self):
+        return IterationHistory(self.history, self.history_size)
     
     def __call__(self, f, *args, **kwargs):
         raise NotImplementedError("__call__() function not yet implemented.")
\ No newline at end of file
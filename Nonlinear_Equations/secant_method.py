@@ -7,29 +7,28 @@ class SecantMethod(NonlinearScalarSystemSolver):
 
     name = "Secant Method"
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
-        super(SecantMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
+        super(SecantMethod, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
 
     def __call__(self, f, x1=0, x2=1):
         self.f = f
-        self.iterations = []
+        self.iterations = self._new_history()
         return self.solve(f=f, x1=x1, x2=x2)
 
     def solve(self, f, x1, x2):
         
-        # initialization
-        self.iterations.append(x1)
-        self.iterations.append(x2)
+        # initialization, f(x) is only evaluated once per iterate
+        f1, f2 = f(x1), f(x2)
+        self.iterations.append(x1, residual=np.abs(f1))
+        self.iterations.append(x2, residual=np.abs(f2))
 
         k = 0
-        while np.abs(f(x2)) > self.tol and k < self.max_iter:
+        while np.abs(f2) > self.tol and k < self.max_iter:
             k += 1
 
             if self.verbose:
                 print(f"Iteration {k}: x1 = {x1}, x2 = {x2}")
 
-            f1 = f(x1)
-            f2 = f(x2)
             x = x2 - ( f2 * (x2 - x1) ) / ( f2 - f1 )
             if self.verbose:
                 print(f"    x <-- {x2} - ({f2} * ({x2} - {x1}) / ({f2} - {f1})")
@@ -38,10 +37,11 @@ class SecantMethod(NonlinearScalarSystemSolver):
                 print()
             
             x1, x2 = x2, x
-            self.iterations.append(x)
+            f1, f2 = f2, f(x)
+            self.iterations.append(x, residual=np.abs(f2))
 
         if self.verbose:
-            print(f"f({x2}) = {f(x2)}")
+            print(f"f({x2}) = {f2}")
         return x2
 
     def annotate_plot(self):
@@ -1,27 +1,67 @@
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from Linear_Systems.sparse_matrix import CSRMatrix, is_sparse
+from Linear_Systems.linear_system_solver import LinearSystemSolver
+from Linear_Systems.lu_decomposition import LUDecomposition
+from Linear_Systems.tridiagonal_solver import TridiagonalSolver
+from iteration_history import IterationHistory
 
 class ClassicalRelaxation(object):
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
+    # orders Guass-Seidel and SOR can sweep the rows in, see _solve_multicolor
+    orderings = ("natural", "multicolor")
+    ordering = "natural"
+    n_threads = None
+
+    # the relaxation factor multicolor sweeps use, SOR sets its own
+    omega = 1
+
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
         self.tol = tol
         self.max_iter = max_iter
         self.verbose = verbose
-        self.iterations = []
+
+        # what to keep in self.iterations, see IterationHistory for the policies
+        self.history = history
+        self.history_size = history_size
+        self.iterations = self._new_history()
+
+    def _new_history(self):
+        return IterationHistory(self.history, self.history_size)
     
-    def __call__(self, A, f, H, X0=None):
-        A = np.array(A)
-        f = np.array(f)
-        self.H = np.array(H)
+    def __call__(self, A, f, H, X0=None, return_info=False):
+        """
+        f can be a vector, or an (n, k) block of right-hand sides that are relaxed together
+            every column stops being updated once its own residual is below tol
+        return_info = True also returns the number of iterations and final residual of every column
+        """
+        A = A if is_sparse(A) else np.array(A)
+        f = np.array(f, dtype=float)
+        self.H = H if is_sparse(H) else np.array(H)
         m, n = A.shape
 
         if X0 is None:
-            X0 = np.ones(n)
+            X0 = np.ones(f.shape)
+        X0 = np.array(X0, dtype=float)
+        if f.ndim == 2 and X0.ndim == 1:
+            # the same initial guess for every column
+            X0 = np.repeat(X0[:, None], f.shape[1], axis=1)
         
-        self.iterations = []
-        return self.solve(A, f, X0) 
+        self.iterations = self._new_history()
+        X = self.solve(A, f, X0)
+
+        if not return_info:
+            return X
+        if f.ndim == 2:
+            return X, self.column_iterations, self.column_residuals
+        return X, self.iterations.count - 1, np.linalg.norm(A @ X - f)
     
     @staticmethod
     def decompose(A):
+        if is_sparse(A):
+            return A.tril(k=-1), CSRMatrix.from_diagonal(A.diagonal()), A.triu(k=1)
+
         L = np.tril(A, k=-1)
         D = np.diag(np.diag(A))
         U = np.triu(A, k=1)
@@ -29,12 +69,16 @@ class ClassicalRelaxation(object):
         return L, D, U
 
     @staticmethod
-    def B(M, diag, p=False):
+    def B(M, diag, p=False, sparse=False):
         if len(diag) % 2 == 0:
             raise ValueError("Please use an odd number of parameters as to not be ambiguous")
         if len(diag) > M:
             raise ValueError(f"Number of parameters is greater than the size of the matrix ({M})")
 
+        # only the diagonals are stored, so this works for grids that don't fit densely in memory
+        if sparse:
+            return CSRMatrix.from_diagonals(M, diag, p=p)
+
         half = len(diag) // 2
         A = np.zeros((M, M)) 
 
@@ -54,19 +98,299 @@ class ClassicalRelaxation(object):
         return A
 
     @staticmethod
-    def exact_solution(A, f):
-        A = np.array(A)
+    def B_2d(M, diag, p=False, sparse=True):
+        """
+        the same stencil in both directions of an M x M grid, numbered row by row (index = i*M + j)
+            B_2d(M, (1, -2, 1)) is the 5-point Laplacian with -4 on the diagonal
+        """
+        T = ClassicalRelaxation.B(M, diag, p=p, sparse=True)
+        I = CSRMatrix.identity(M)
+        A = CSRMatrix.kron(I, T) + CSRMatrix.kron(T, I)
+        return A if sparse else A.toarray()
+
+    @staticmethod
+    def exact_solution(A, f, method="auto"):
+        """
+        the reference solution the relaxation methods are compared against
+            method is one of LinearSystemSolver.solution_methods, "auto" picks one from the structure of A
+            (e.g. LDL.T for the symmetric matrices B produces) and "inverse" forms A^(-1) like we used to
+        """
+        A = A if is_sparse(A) else np.array(A)
         f = np.array(f)
-        return np.linalg.inv(A) @ f
+
+        if method == "lu":
+            # the stencils B produces with 3 parameters are (cyclic) tridiagonal, which we can solve in O(n)
+            # as long as leaving out the pivoting is safe (e.g. diagonally dominant), otherwise it's a pivoted LU
+            if TridiagonalSolver.is_stable(A):
+                return TridiagonalSolver()(A, f)
+            return LUDecomposition().factor(A, minimize_roundoff=True).solve(f)
+        return LinearSystemSolver.analytical_solution(A, f, method=method)
+
+    @staticmethod
+    def _is_zero(M):
+        return M.nnz == 0 if is_sparse(M) else not np.any(M)
+
+    def _H_inv_operator(self, H=None):
+        """
+        r --> H^(-1) @ r without ever inverting H (self.H by default)
+            Point-Jacobean: H is diagonal, so this is a diagonal scaling
+            Guass-Seidel, SOR: H is lower triangular, so this is a forward sweep
+        """
+        H = self.H if H is None else H
+        L, D, U = self.decompose(H)
+        if self._is_zero(L) and self._is_zero(U):
+            d = H.diagonal() if is_sparse(H) else np.diag(H)
+            return lambda r: (r.T / d).T
+        if self._is_zero(U):
+            return lambda r: LinearSystemSolver.forward_substitution(H, r)
+        if self._is_zero(L):
+            return lambda r: LinearSystemSolver.backward_substitution(H, r)
+        return LUDecomposition().factor(H).solve
+
+    def splitting(self, A):
+        """
+        the H each method iterates with, X_(k+1) = X_k + H^(-1) @ (A @ X_k - f)
+        """
+        raise NotImplementedError("ClassicalRelaxation is called with H directly, the methods built on it choose their own.")
+
+    def sweeper(self, A):
+        """
+        returns sweep(X, f), a single relaxation iteration for A @ X = f
+            everything that only depends on A is done once here, so repeated sweeps (e.g. smoothing in Multigrid) stay cheap
+        """
+        H_inv = self._H_inv_operator(self.splitting(A))
+        return lambda X, f: X + H_inv(A @ X - f)
+
+    def _solve_matrix_free(self, A, f, X0):
+        """
+        Same iteration as the trace in solve(), written as X_(k+1) = X_k + H^(-1) @ (A @ X_k - f)
+        so that neither H^(-1) nor G ever has to be formed, and each iteration costs O(nnz(A))
+        """
+        if self.verbose:
+            print("A =", repr(A) if is_sparse(A) else f"\n{A}")
+            print()
+            print("H =", repr(self.H) if is_sparse(self.H) else f"\n{self.H}")
+            print()
+            print("*"*100)
+            print()
+
+        H_inv = self._H_inv_operator()
+
+        X = np.array(X0, dtype=float).copy()
+        error = A @ X - f
+        self.iterations.append(X, residual=np.linalg.norm(error))
+
+        k = 0
+        while np.linalg.norm(error) > self.tol and k < self.max_iter:
+            k += 1
+
+            # iterate
+            X = X + H_inv(error)
+            error = A @ X - f
+
+            if self.verbose:
+                print(f"Iteration {k}: |A @ X{k} - f| = {np.linalg.norm(error)}")
+
+            self.iterations.append(X, residual=np.linalg.norm(error))
+
+        if self.verbose:
+            print(f"Relaxed Solution:  X =", X)
+        return X
+
+    @staticmethod
+    def coloring(A):
+        """
+        greedy coloring of the graph of A, where i and j are neighbours if A[i, j] or A[j, i] is nonzero
+            rows of the same color never couple, so they can all be relaxed at once
+            the tridiagonal stencils B produces get the red-black ordering 0, 1, 0, 1, ...
+        """
+        A = A if is_sparse(A) else CSRMatrix.from_dense(A)
+        n = A.shape[0]
+        rows, cols = A.row_indices, A.indices
+
+        # stencils (banded, periodic or on 2-D grids) can usually be colored by i mod k for a small k,
+        # banded ones always by i mod (h+1), and if one of those is valid we can skip the greedy loop
+        distance = np.abs(cols - rows)
+        h = int(np.minimum(distance, n - distance).max()) if A.nnz else 0
+        for k in list(range(1, min(h + 1, 8) + 1)) + [h + 1]:
+            colors = np.arange(n) % k
+            if not np.any((colors[rows] == colors[cols]) & (rows != cols)):
+                return colors
+
+        # python lists are much faster than numpy for this row by row loop
+        indptr, indices = A.indptr.tolist(), A.indices.tolist()
+        At = A.T
+        indptr_t, indices_t = At.indptr.tolist(), At.indices.tolist()
+
+        colors = [-1] * n
+        for i in range(n):
+            used = {colors[j] for j in indices[indptr[i]:indptr[i+1]]}
+            used.update(colors[j] for j in indices_t[indptr_t[i]:indptr_t[i+1]])
+            c = 0
+            while c in used:
+                c += 1
+            colors[i] = c
+
+        return np.array(colors)
+
+    def _multicolor_sweeper(self, A, w=1, n_threads=None, pool=None):
+        """
+        returns sweep(X, f), one Guass-Seidel (w = 1) or SOR sweep with the rows relaxed color by color
+            X[c] = X[c] + w * (f[c] - A[c] @ X) / D[c]
+        every color is a single vectorized update, split into n_threads pieces that run on pool
+        """
+        self.colors = self.coloring(A)
+        d = A.diagonal() if is_sparse(A) else np.diag(A)
+        if np.any(d == 0):
+            raise ValueError("A must have a nonzero diagonal.")
+
+        # the rows of every color (and of every thread's share of it) are only gathered once
+        n_chunks = 1 if n_threads is None else n_threads
+        blocks = []
+        for c in range(self.colors.max() + 1):
+            rows = np.flatnonzero(self.colors == c)
+            chunks = np.array_split(rows, min(n_chunks, len(rows)))
+            blocks.append([(chunk, A.take_rows(chunk) if is_sparse(A) else A[chunk], d[chunk]) for chunk in chunks])
+
+        def sweep(X, f):
+            def relax(block):
+                rows, A_rows, d_rows = block
+                X[rows] += w * ((f[rows] - A_rows @ X).T / d_rows).T
+
+            for color_blocks in blocks:
+                if pool is None:
+                    for block in color_blocks:
+                        relax(block)
+                else:
+                    list(pool.map(relax, color_blocks))
+            return X
+
+        return sweep
+
+    def _solve_multicolor(self, A, f, X0, w=1, n_threads=None):
+        """
+        Guass-Seidel and SOR in multicolor order, optionally split across n_threads threads.
+        The ordering changes the iterates, but not the solution they converge to.
+        """
+        pool = ThreadPoolExecutor(n_threads) if n_threads is not None else None
+        try:
+            sweep = self._multicolor_sweeper(A, w=w, n_threads=n_threads, pool=pool)
+
+            if self.verbose:
+                n_colors = self.colors.max() + 1
+                print("A =", repr(A) if is_sparse(A) else f"\n{A}")
+                print()
+                print(f"{n_colors} colors:", self.colors if len(self.colors) <= 20 else f"{np.bincount(self.colors)} rows each")
+                print()
+                print("*"*100)
+                print()
+
+            X = np.array(X0, dtype=float).copy()
+            error = A @ X - f
+            self.iterations.append(X, residual=np.linalg.norm(error))
+
+            k = 0
+            while np.linalg.norm(error) > self.tol and k < self.max_iter:
+                k += 1
+
+                # iterate, one color at a time
+                X = sweep(X, f)
+                error = A @ X - f
+
+                if self.verbose:
+                    print(f"Iteration {k}: |A @ X{k} - f| = {np.linalg.norm(error)}")
+
+                self.iterations.append(X, residual=np.linalg.norm(error))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if self.verbose:
+            print(f"Relaxed Solution:  X =", X)
+        return X
+
+    def _solve_block(self, A, F, X0):
+        """
+        relaxes every column of F at once, with matrix-matrix products
+            a column that meets tol is left alone from then on, so the others don't pay for it
+            self.column_iterations and self.column_residuals keep track of every column
+        """
+        pool = ThreadPoolExecutor(self.n_threads) if self.ordering == "multicolor" and self.n_threads is not None else None
+        try:
+            if self.ordering == "multicolor":
+                sweep = self._multicolor_sweeper(A, w=self.omega, n_threads=self.n_threads, pool=pool)
+                step = lambda X, F, error: sweep(X, F)
+            else:
+                H_inv = self._H_inv_operator()
+                step = lambda X, F, error: X + H_inv(error)
+
+            X = np.array(X0, dtype=float).copy()
+            error = A @ X - F
+            residuals = np.linalg.norm(error, axis=0)
+            self.column_iterations = np.zeros(F.shape[1], dtype=int)
+            self.iterations.append(X, residual=residuals.max())
+
+            if self.verbose:
+                print("A =", repr(A) if is_sparse(A) else f"\n{A}")
+                print()
+                print(f"{F.shape[1]} right-hand sides")
+                print()
+                print("*"*100)
+                print()
+
+            # the columns still being relaxed are kept in their own contiguous blocks, which only shrink when a column converges
+            active = np.flatnonzero(residuals > self.tol)
+            X_a, F_a, error_a = X[:, active], F[:, active], error[:, active]
+
+            k = 0
+            while len(active) > 0 and k < self.max_iter:
+                k += 1
+
+                # iterate
+                X_a = step(X_a, F_a, error_a)
+                error_a = A @ X_a - F_a
+                residuals[active] = np.linalg.norm(error_a, axis=0)
+                self.column_iterations[active] += 1
+
+                converged = residuals[active] <= self.tol
+                if np.any(converged) or self.iterations.keeps_iterates:
+                    X[:, active] = X_a
+                if np.any(converged):
+                    keep = ~converged
+                    active, X_a, F_a, error_a = active[keep], X_a[:, keep], F_a[:, keep], error_a[:, keep]
+
+                if self.verbose:
+                    print(f"Iteration {k}: max |A @ X{k} - f| = {residuals.max()}, {len(active)} columns left")
+
+                self.iterations.append(X, residual=residuals.max())
+
+            X[:, active] = X_a
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.column_residuals = residuals
+        if self.verbose:
+            print(f"Relaxed Solution:  X =\n", X)
+        return X
 
     def solve(self, A, f, X0):
+        f = np.array(f, dtype=float)
+        if f.ndim == 2:
+            return self._solve_block(A, f, X0)
+
+        # forming H^(-1) and G is only worth its cost when we want to print them
+        if is_sparse(A) or not self.verbose:
+            return self._solve_matrix_free(A, f, X0)
+
         A = np.array(A)
         f = np.array(f)
         m, n = A.shape
 
-        # initialization
+        # initialization, H^(-1) @ f doesn't change between iterations
         H_inv = np.linalg.inv(self.H)
         self.G = np.identity(n) + H_inv @ A
+        H_inv_f = H_inv @ f
         if self.verbose:
             print("A =\n", A)
             print()
@@ -84,24 +408,24 @@ class ClassicalRelaxation(object):
         # more initialization
         X = np.array(X0, dtype=float).copy()
         error = A @ X - f
-        self.iterations.append(X)
+        self.iterations.append(X, residual=np.linalg.norm(error))
 
         k = 0
         while np.linalg.norm(error) > self.tol and k < self.max_iter:
             k += 1
             
             # iterate
-            X_new = self.G @ X - H_inv @ f
+            X_new = self.G @ X - H_inv_f
             error = A @ X_new - f
 
             if self.verbose:
                 print(f"Iteration {k}: X{k-1} = {X}")
-                print(f"\tX{k} = G @ X{k-1} - H^(-1) @ f = {self.G @ X} - {H_inv @ f} = {X_new}")
+                print(f"\tX{k} = G @ X{k-1} - H^(-1) @ f = {self.G @ X} - {H_inv_f} = {X_new}")
                 print(f"\tError = A @ X{k} - f = {A @ X_new} - {f} = {error}")
                 print("\n")
             
             X = X_new
-            self.iterations.append(X.copy())
+            self.iterations.append(X, residual=np.linalg.norm(error))
 
         if self.verbose:
             print(f"Relaxed Solution:  X =", X)
@@ -4,13 +4,33 @@ import numpy as np
 
 class GuassSeidelRelaxation(ClassicalRelaxation):
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
-        super(GuassSeidelRelaxation, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None, ordering="natural", n_threads=None):
+        super(GuassSeidelRelaxation, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
         
-    def __call__(self, A, f, X0=None):
+        # "natural" sweeps the rows in order, "multicolor" relaxes them color by color (red-black for tridiagonal A)
+        if ordering not in self.orderings:
+            raise ValueError(f"ordering must be one of {self.orderings}. Currently {ordering}")
+        self.ordering = ordering
+        self.n_threads = n_threads
+
+    def __call__(self, A, f, X0=None, return_info=False):
+        H = self.splitting(A)
+        return super(GuassSeidelRelaxation, self).__call__(A=A, f=f, H=H, X0=X0, return_info=return_info)
+
+    def splitting(self, A):
         L, D, U = self.decompose(A)
-        H = -(L + D)
-        return super(GuassSeidelRelaxation, self).__call__(A=A, f=f, H=H, X0=X0)
+        return -(L + D)
+
+    def sweeper(self, A):
+        if self.ordering == "multicolor":
+            return self._multicolor_sweeper(A, w=1)
+        return super(GuassSeidelRelaxation, self).sweeper(A)
+
+    def solve(self, A, f, X0):
+        # a block of right-hand sides goes through ClassicalRelaxation._solve_block, which handles both orderings
+        if self.ordering == "multicolor" and np.ndim(f) == 1:
+            return self._solve_multicolor(A, np.array(f, dtype=float), X0, w=1, n_threads=self.n_threads)
+        return super(GuassSeidelRelaxation, self).solve(A, f, X0)
 
 
 if __name__ == "__main__":
@@ -23,4 +43,14 @@ if __name__ == "__main__":
     X0 = [1, 1, 1]
     Relax(A, f, X0=X0)
     print()
-    print("Exact Solution:   ", Relax.exact_solution(A, f))
\ No newline at end of file
+    print("Exact Solution:   ", Relax.exact_solution(A, f))
+    print()
+
+    # red-black ordering on a bigger grid
+    Relax = GuassSeidelRelaxation(max_iter=1000, ordering="multicolor", n_threads=4)
+
+    A = Relax.B(1000, (1, -2.5, 1), sparse=True)
+    f = np.ones(1000)
+
+    X = Relax(A, f)
+    print(f"Red-Black: {Relax.iterations.count - 1} iterations, |A @ X - f| = {np.linalg.norm(A @ X - f)}")
\ No newline at end of file
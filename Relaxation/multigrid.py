@@ -0,0 +1,218 @@
+from classical_relaxation import ClassicalRelaxation
+from point_jacobean import PointJacobeanRelaxation
+
+import numpy as np
+
+from Linear_Systems.sparse_matrix import CSRMatrix, is_sparse
+from Linear_Systems.lu_decomposition import LUDecomposition
+from Linear_Systems.tridiagonal_solver import TridiagonalSolver
+
+class Level(object):
+    """
+    one grid of the hierarchy
+        A       the operator on this grid
+        R, P    restriction to and prolongation from the next coarser grid
+        sweep   one smoothing sweep, sweep(X, f)
+        solve   exact solver, only on the coarsest grid
+    """
+
+    def __init__(self, A, grid):
+        self.A = A
+        self.grid = grid
+        self.R = self.P = self.sweep = self.solve = None
+
+
+class Multigrid(ClassicalRelaxation):
+    """
+    Geometric multigrid for the stencils B (1-D) and B_2d (2-D) produce
+        a few relaxation sweeps smooth the error, what's left of it is smooth enough
+        to be fixed on a grid with half the points, and so on recursively
+    cycle = "V" visits each coarser grid once per cycle, "W" twice,
+    "FMG" starts on the coarsest grid and interpolates its way up before doing V-cycles
+    Every cycle costs O(n) and cuts the residual by a factor that doesn't depend on n.
+
+    1-D grids with n = 2^k - 1 points (or n = 2^k when periodic) coarsen all the way down,
+    shape = (M, M) is used for B_2d(M, ...), i.e. 2-D grids numbered row by row
+    """
+
+    cycles = ("V", "W", "FMG")
+
+    def __init__(self, smoother=None, cycle="V", pre_smooth=2, post_smooth=2, shape=None, p=False, coarsest=3,
+                 tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None):
+        super(Multigrid, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
+
+        if cycle not in self.cycles:
+            raise ValueError(f"cycle must be one of {self.cycles}. Currently {cycle}")
+
+        # weighted Jacobi with w = 2/3 damps the oscillatory half of the error the most
+        self.smoother = PointJacobeanRelaxation(w=2/3) if smoother is None else smoother
+        self.cycle = cycle
+        self.pre_smooth = pre_smooth
+        self.post_smooth = post_smooth
+        self.shape = shape
+        self.p = p
+        self.coarsest = coarsest
+
+    def __call__(self, A, f, X0=None):
+        A = A if is_sparse(A) else CSRMatrix.from_dense(A)
+        f = np.array(f, dtype=float)
+        m, n = A.shape
+
+        if X0 is None:
+            X0 = np.ones(n)
+
+        self.levels = self.hierarchy(A)
+        self.iterations = self._new_history()
+        return self.solve(A, f, X0)
+
+    @staticmethod
+    def restriction(n, p=False):
+        """
+        full weighting from a 1-D grid of n points to the grid with every other point, i.e. x_c[j] = (x[i-1] + 2 x[i] + x[i+1]) / 4
+            coarse point j sits on fine point 2j+1, or 2j when periodic
+        """
+        if p:
+            n_c = n // 2
+            centers = 2 * np.arange(n_c)
+        else:
+            n_c = (n - 1) // 2
+            centers = 2 * np.arange(n_c) + 1
+
+        rows = np.repeat(np.arange(n_c), 3)
+        cols = (centers[:, None] + np.array([-1, 0, 1])).ravel() % n
+        vals = np.tile([0.25, 0.5, 0.25], n_c)
+        return CSRMatrix.from_coo(rows, cols, vals, (n_c, n))
+
+    def _coarse_grid(self, grid):
+        # None once any direction can't be halved any more
+        coarse = []
+        for n in grid:
+            if n <= self.coarsest or (self.p and n % 2 == 1):
+                return None
+            coarse.append(n // 2 if self.p else (n - 1) // 2)
+        return tuple(coarse)
+
+    def hierarchy(self, A):
+        """
+        the grids from finest to coarsest, with Galerkin coarse operators A_c = R @ A @ P
+        """
+        grid = (A.shape[0],) if self.shape is None else tuple(self.shape)
+        if np.prod(grid) != A.shape[0]:
+            raise ValueError(f"A grid of shape {grid} doesn't have {A.shape[0]} points.")
+
+        levels = [Level(A, grid)]
+        coarse = self._coarse_grid(grid)
+        while coarse is not None:
+            level = levels[-1]
+
+            # the 2-D transfer operators are products of the 1-D ones, and interpolation is 2^d times restriction's transpose
+            level.R = self.restriction(grid[0], self.p)
+            for n in grid[1:]:
+                level.R = CSRMatrix.kron(level.R, self.restriction(n, self.p))
+            level.P = level.R.T * 2**len(grid)
+            level.sweep = self.smoother.sweeper(level.A)
+
+            levels.append(Level(level.R @ (level.A @ level.P), coarse))
+            grid, coarse = coarse, self._coarse_grid(coarse)
+
+        # the coarsest grid is small enough to solve exactly, and it's only factored once
+        A_c = levels[-1].A
+        if TridiagonalSolver.is_stable(A_c):
+            levels[-1].solve = lambda r: TridiagonalSolver()(A_c, r)
+        else:
+            levels[-1].solve = LUDecomposition().factor(A_c.toarray(), minimize_roundoff=True).solve
+
+        return levels
+
+    def _cycle(self, l, X, f, gamma=1):
+        """
+        a V-cycle (gamma = 1) or W-cycle (gamma = 2) for A_l @ X = f starting from X
+        """
+        level = self.levels[l]
+        if level.solve is not None:
+            return level.solve(f)
+
+        for _ in range(self.pre_smooth):
+            X = level.sweep(X, f)
+
+        # the error solves A_l @ E = f - A_l @ X, which is smooth enough to solve on the coarser grid
+        r_c = level.R @ (f - level.A @ X)
+        E = np.zeros(len(r_c))
+        for _ in range(gamma):
+            E = self._cycle(l + 1, E, r_c, gamma)
+        X = X + level.P @ E
+
+        for _ in range(self.post_smooth):
+            X = level.sweep(X, f)
+        return X
+
+    def _full_multigrid(self, f):
+        """
+        solve on the coarsest grid, then interpolate up one grid at a time, doing a V-cycle on each
+        """
+        rhs = [f]
+        for level in self.levels[:-1]:
+            rhs.append(level.R @ rhs[-1])
+
+        X = self.levels[-1].solve(rhs[-1])
+        for l in reversed(range(len(self.levels) - 1)):
+            X = self._cycle(l, self.levels[l].P @ X, rhs[l])
+        return X
+
+    def solve(self, A, f, X0):
+        if self.verbose:
+            for l, level in enumerate(self.levels):
+                print(f"Level {l}: grid {level.grid}, nnz = {level.A.nnz}")
+            print()
+            print("*"*100)
+            print()
+
+        X = np.array(X0, dtype=float).copy()
+        error = A @ X - f
+        self.iterations.append(X, residual=np.linalg.norm(error))
+
+        k = 0
+        while np.linalg.norm(error) > self.tol and k < self.max_iter:
+            k += 1
+            previous = np.linalg.norm(error)
+
+            # iterate
+            if self.cycle == "FMG" and k == 1:
+                X = X + self._full_multigrid(-error)
+            else:
+                X = self._cycle(0, X, f, gamma=2 if self.cycle == "W" else 1)
+            error = A @ X - f
+
+            if self.verbose:
+                print(f"Cycle {k}: |A @ X{k} - f| = {np.linalg.norm(error)}, reduced by {np.linalg.norm(error) / previous}")
+
+            self.iterations.append(X, residual=np.linalg.norm(error))
+
+        if self.verbose:
+            print(f"Multigrid Solution:  X =", X)
+        return X
+
+
+if __name__ == "__main__":
+
+    from guass_seidel import GuassSeidelRelaxation
+
+    # 1-D Poisson problem, the cycle count doesn't grow with the grid
+    #   (A's condition number grows like n^2, so a relative residual much below 1e-5 isn't reachable in double precision for the biggest one)
+    for k in (5, 10, 15, 20):
+        n = 2**k - 1
+        A = Multigrid.B(n, (1, -2, 1), sparse=True)
+        f = np.ones(n)
+
+        MG = Multigrid(tol=1e-4 * np.linalg.norm(f), history="residual")
+        X = MG(A, f)
+        print(f"n = {n}: {MG.iterations.count - 1} V-cycles, |A @ X - f| = {MG.iterations.residuals[-1]}")
+    print()
+
+    # 2-D Poisson problem with red-black Guass-Seidel smoothing
+    M = 63
+    A = Multigrid.B_2d(M, (1, -2, 1))
+    f = np.ones(M**2)
+
+    MG = Multigrid(smoother=GuassSeidelRelaxation(ordering="multicolor"), cycle="FMG", shape=(M, M), tol=1e-8, verbose=True, history="residual")
+    X = MG(A, f)
@@ -4,13 +4,19 @@ import numpy as np
 
 class PointJacobeanRelaxation(ClassicalRelaxation):
 
-    def __init__(self, tol=1e-5, max_iter=100, verbose=False):
-        super(PointJacobeanRelaxation, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None, w=1):
+        super(PointJacobeanRelaxation, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
         
-    def __call__(self, A, f, X0=None):
+        # weighted (damped) Jacobi, w = 2/3 is the usual choice when it is used as a smoother
+        self.w = w
+
+    def __call__(self, A, f, X0=None, return_info=False):
+        H = self.splitting(A)
+        return super(PointJacobeanRelaxation, self).__call__(A=A, f=f, H=H, X0=X0, return_info=return_info)
+
+    def splitting(self, A):
         L, D, U = self.decompose(A)
-        H = -D
-        return super(PointJacobeanRelaxation, self).__call__(A=A, f=f, H=H, X0=X0)
+        return -D / self.w
 
 
 if __name__ == "__main__":
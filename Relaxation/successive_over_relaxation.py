@@ -1,28 +1,246 @@
 from classical_relaxation import ClassicalRelaxation
 
+import hashlib
 import numpy as np
+from collections import OrderedDict
+
+from Linear_Systems.sparse_matrix import is_sparse
+from Linear_Systems.tridiagonal_solver import TridiagonalSolver
 
 class SuccessiveOverRelaxation(ClassicalRelaxation):
+    """
+    w = a number      uses that relaxation factor (w = 1 --> Guass-Seidel Relaxation method)
+    w = None          the optimum for the model problem B(m, (1, -2, 1)), 2 / (1 + sin(pi / (m+1)))
+    w = "auto"        the optimum 2 / (1 + sqrt(1 - mu^2)) for the Jacobi spectral radius mu of A, exact when A is tridiagonal
+                      with constant diagonals (e.g. the model problem), otherwise estimated from spectral_iterations products
+                      with J (a lower bound, so w errs on the safe side of the optimum)
+    w = "adaptive"    starts from the "auto" estimate and keeps improving it from how fast the residual actually shrinks
+                      (a block of right-hand sides, or an A whose mu is known exactly, just uses the "auto" w)
+    the mu estimates are cached by the shape and contents of A, so solving with the same A again doesn't redo them
+    """
+
+    factors = ("auto", "adaptive")
 
-    def __init__(self, w=None, tol=1e-5, max_iter=100, verbose=False):
-        super(SuccessiveOverRelaxation, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose)
+    def __init__(self, w=None, tol=1e-5, max_iter=100, verbose=False, history="all", history_size=None, ordering="natural", n_threads=None,
+                 spectral_iterations=50, adapt_every=10, cache_size=16):
+        super(SuccessiveOverRelaxation, self).__init__(tol=tol, max_iter=max_iter, verbose=verbose, history=history, history_size=history_size)
+
+        if isinstance(w, str) and w not in self.factors:
+            raise ValueError(f"w must be a number, None, or one of {self.factors}. Currently {w}")
         self.w = w
 
-        # w = 2 --> Gauss-Seidel Relaxation method
+        # "natural" sweeps the rows in order, "multicolor" relaxes them color by color (red-black for tridiagonal A)
+        if ordering not in self.orderings:
+            raise ValueError(f"ordering must be one of {self.orderings}. Currently {ordering}")
+        self.ordering = ordering
+        self.n_threads = n_threads
+
+        self.spectral_iterations = spectral_iterations
+        self.adapt_every = adapt_every
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
 
-    def __call__(self, A, f, X0=None):
-        m, n = A.shape
+    def __call__(self, A, f, X0=None, return_info=False):
+        # the w this call actually uses, self.w is left alone so the next call (maybe with another A) starts from scratch
+        self.omega = self.relaxation_factor(A)
 
+        H = self.splitting(A)
+        return super(SuccessiveOverRelaxation, self).__call__(A=A, f=f, H=H, X0=X0, return_info=return_info)
+
+    @staticmethod
+    def optimal_w(mu):
+        """
+        optimum w for a (consistently ordered) A whose Jacobi iteration matrix has spectral radius mu
+        """
+        if mu >= 1:
+            # Jacobi doesn't converge, so there's no theory to go by, Guass-Seidel is the safe choice
+            return 1.0
+        return 2 / (1 + np.sqrt(1 - mu**2))
+
+    def relaxation_factor(self, A):
         if self.w is None:
-            # optimum w
-            self.w = 2 / (1 + np.sin(np.pi / (m+1)))
-        H = self.B(m, (-1, 2/self.w, 0))
+            m, n = A.shape
+            return 2 / (1 + np.sin(np.pi / (m+1)))
+        if isinstance(self.w, str):
+            return self.optimal_w(self.jacobi_spectral_radius(A))
+        return self.w
+
+    @staticmethod
+    def _cache_key(A):
+        if is_sparse(A):
+            parts = (A.data, A.indices, A.indptr)
+        else:
+            parts = (np.ascontiguousarray(A, dtype=float),)
+
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update(part.tobytes())
+        return (A.shape, digest.hexdigest())
+
+    def _cached(self, A, mu=None):
+        """
+        looks up the mu estimate for A, or stores one if mu is given
+        """
+        key = self._cache_key(A)
+        if mu is not None:
+            self._cache[key] = mu
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        elif key in self._cache:
+            self._cache.move_to_end(key)
+        return self._cache.get(key)
+
+    @staticmethod
+    def model_spectral_radius(A):
+        """
+        mu in closed form when A is tridiagonal with constant diagonals (a, b, c), like the model problem B(m, (1, -2, 1))
+            the eigenvalues of J are 2 * sqrt(a * c) / b * cos(k * pi / (n+1)), k = 1, ..., n, so mu is the k = 1 one
+        returns None for any other A, or when a * c <= 0 (then the eigenvalues of J aren't real)
+        """
+        try:
+            a, b, c, alpha, beta = TridiagonalSolver.diagonals(A)
+        except ValueError:
+            return None
+
+        n = A.shape[0]
+        a, c = a[1:], c[:-1]
+        if n < 2 or alpha or beta or np.ptp(a) or np.ptp(b) or np.ptp(c) or b[0] == 0 or a[0] * c[0] <= 0:
+            return None
+        return 2 * np.sqrt(a[0] * c[0]) / abs(b[0]) * np.cos(np.pi / (n+1))
+
+    def jacobi_spectral_radius(self, A):
+        """
+        estimates the spectral radius mu of J = I - D^(-1) @ A from the Krylov subspace of spectral_iterations products with J
+            plain power iteration converges like (mu_2 / mu)^k, which for Poisson-type A is so close to 1 that it takes thousands of steps
+            instead we keep every vector it would have produced, orthonormalize them (Arnoldi) and take the largest Ritz value,
+            the best Rayleigh quotient over all of them, for the price of the same handful of products
+        starting from ones, which is close to the dominant eigenvector whenever J is nonnegative (Perron-Frobenius)
+        the products are taken in the |D|-weighted inner product, in which J is symmetric whenever A is,
+            so then the Ritz value never overshoots mu, w stays below the optimum and "adaptive" only has to move it up
+        """
+        mu = self._cached(A)
+        if mu is not None:
+            return mu
+
+        # no need to estimate what we know exactly
+        A = A if is_sparse(A) else np.array(A, dtype=float)
+        mu = self.model_spectral_radius(A)
+        if mu is not None:
+            if self.verbose:
+                print(f"Jacobi spectral radius: mu = {mu}, w = {self.optimal_w(mu)}")
+            return self._cached(A, mu)
+
+        d = A.diagonal() if is_sparse(A) else np.diag(A)
+        n = A.shape[0]
+        k = min(self.spectral_iterations, n)
+
+        V = np.zeros((k+1, n))
+        H = np.zeros((k+1, k))
+        weight = np.abs(d)
+        norm = lambda x: np.sqrt(x @ (weight * x))
+
+        V[0] = np.ones(n) / norm(np.ones(n))
+        for j in range(k):
+            # Arnoldi with modified Gram-Schmidt, like GMRES
+            w = V[j] - (A @ V[j]) / d
+            for i in range(j+1):
+                H[i, j] = w @ (weight * V[i])
+                w = w - H[i, j] * V[i]
+            H[j+1, j] = norm(w)
+            if H[j+1, j] <= 1e-12 * abs(H[j, j]):
+                # the subspace is invariant, so its Ritz values are eigenvalues of J
+                k = j + 1
+                break
+            V[j+1] = w / H[j+1, j]
 
-        return super(SuccessiveOverRelaxation, self).__call__(A=A, f=f, H=H, X0=X0)
+        mu = np.max(np.abs(np.linalg.eigvals(H[:k, :k])))
+        if self.verbose:
+            print(f"Estimated Jacobi spectral radius: mu = {mu}, w = {self.optimal_w(mu)}")
+        return self._cached(A, mu)
+
+    def splitting(self, A):
+        # H = -(D/w + L), which for the model problem B(m, (1, -2, 1)) is B(m, (-1, 2/w, 0))
+        L, D, U = self.decompose(A)
+        return -(D / self.omega + L)
+
+    def sweeper(self, A):
+        self.omega = self.relaxation_factor(A)
+        if self.ordering == "multicolor":
+            return self._multicolor_sweeper(A, w=self.omega)
+        return super(SuccessiveOverRelaxation, self).sweeper(A)
+
+    def _solve_adaptive(self, A, f, X0):
+        """
+        SOR that updates w every adapt_every iterations
+            for a consistently ordered A, the contraction lambda of the residual is tied to the Jacobi spectral radius mu by
+                (lambda + w - 1)^2 = lambda * w^2 * mu^2
+            so while w is below the optimum (lambda > w - 1) we can solve for mu and move w up towards the optimum
+        the Ritz estimate approaches mu from below and is slowest when mu is very close to 1 (e.g. Poisson problems),
+            so whatever it is still short by after spectral_iterations steps, this is what makes up for
+        w is so sensitive to lambda here that overestimating lambda by a fraction of 1 - lambda pushes w past the optimum,
+            where the contraction is w - 1 and every step further costs iterations, so only a settled contraction is used (see below)
+        """
+        mu = self.jacobi_spectral_radius(A)
+        sweep = self.sweeper(A)
+
+        X = np.array(X0, dtype=float).copy()
+        error = A @ X - f
+        self.iterations.append(X, residual=np.linalg.norm(error))
+
+        k = 0
+        checkpoint, previous, agreeing = None, None, 0
+        while np.linalg.norm(error) > self.tol and k < self.max_iter:
+            k += 1
+
+            # iterate
+            X_old = X.copy()
+            X = sweep(X, f)
+            error = A @ X - f
+
+            if self.verbose:
+                print(f"Iteration {k}: |A @ X{k} - f| = {np.linalg.norm(error)}, w = {self.omega}")
+
+            self.iterations.append(X, residual=np.linalg.norm(error))
+
+            # the contraction is measured on the size of the updates, averaged over adapt_every iterations
+            #   and only trusted once three windows in a row agree, early on it is still dominated by transients
+            # SOR is far from normal, so after w changes the measured contraction can climb above lambda and take hundreds of
+            #   iterations to come back down, so it isn't trusted while it is falling either
+            if k % self.adapt_every == 1:
+                checkpoint = np.linalg.norm(X - X_old)
+            elif k % self.adapt_every == 0 and checkpoint:
+                contraction = (np.linalg.norm(X - X_old) / checkpoint) ** (1 / (self.adapt_every - 1))
+                agreeing = agreeing + 1 if previous is not None and abs(contraction - previous) < 0.01 * (1 - previous) else 0
+                settled = agreeing >= 2 and contraction >= previous
+                previous = contraction
+
+                # near the optimum lambda is close to w - 1 and the formula is too sensitive to trust,
+                #   so like Hageman and Young we stop adapting once lambda <= (w - 1)^0.75
+                w = self.omega
+                if settled and (w - 1) ** 0.75 < contraction < 1:
+                    mu_observed = np.sqrt((contraction + w - 1)**2 / (contraction * w**2))
+                    if mu < mu_observed < 1:
+                        mu = self._cached(A, mu_observed)
+                        sweep = self.sweeper(A)
+                        previous, agreeing = None, 0
+                        if self.verbose:
+                            print(f"\tobserved contraction {contraction}, so mu = {mu} and w = {self.omega}")
+
+        if self.verbose:
+            print(f"Relaxed Solution:  X =", X)
+        return X
+
+    def solve(self, A, f, X0):
+        if self.w == "adaptive" and np.ndim(f) == 1 and self.model_spectral_radius(A) is None:
+            return self._solve_adaptive(A, np.array(f, dtype=float), X0)
+        # a block of right-hand sides goes through ClassicalRelaxation._solve_block, which handles both orderings
+        if self.ordering == "multicolor" and np.ndim(f) == 1:
+            return self._solve_multicolor(A, np.array(f, dtype=float), X0, w=self.omega, n_threads=self.n_threads)
+        return super(SuccessiveOverRelaxation, self).solve(A, f, X0)
 
 
 if __name__ == "__main__":
-    
+
     Relax = SuccessiveOverRelaxation(w=1, verbose=True)
 
     A = Relax.B(3, (1, -2, 1))
@@ -31,4 +249,14 @@ if __name__ == "__main__":
     X0 = [1, 1, 1]
     Relax(A, f, X0=X0)
     print()
-    print("Exact Solution:   ", Relax.exact_solution(A, f))
\ No newline at end of file
+    print("Exact Solution:   ", Relax.exact_solution(A, f))
+    print()
+
+    # a matrix that isn't the model problem, where the model problem's w is far from optimal
+    A = Relax.B(200, (1, -2.05, 1), sparse=True)
+    f = np.ones(200)
+
+    for w in (None, "auto", "adaptive"):
+        Relax = SuccessiveOverRelaxation(w=w, max_iter=10000, tol=1e-8)
+        Relax(A, f)
+        print(f"w = {w}: {Relax.iterations.count - 1} iterations with w = {Relax.omega}")
@@ -1,3 +1,7 @@
+''' Shared '''
+from iteration_history import IterationHistory
+
+
 ''' Interpolation '''
 from Interpolation.interpolator import Interpolator
 from Interpolation.lagrange_polynomials import LagrangePolynomials
@@ -5,21 +9,29 @@ from Interpolation.natural_cubic_spline import NaturalCubicSpline
 
 
 ''' Integration '''
+from Integration.adaptive_quadrature import AdaptiveQuadrature
 from Integration.compound_quadrature import CompoundQuadrature
 from Integration.gaussian_quadrature import GaussianQuadrature
 from Integration.lagrange_interpolation import LagrangeInterpolation
 from Integration.newton_cotes import NewtonCotes
 #from Integration.numerical_integration import 
+from Integration.romberg_integration import RombergIntegration
 from Integration.simpsons_rule import SimpsonsRule
 from Integration.trapezoidal_rule import TrapezoidalRule
 from Integration.exact_integral import exact_integral
 
 
 ''' Linear Systems '''
-from Linear_Systems.least_squares_fitting import LeastSquaresFitting
+from Linear_Systems.least_squares_fitting import LeastSquaresFitting, GivensQR, HouseholderQR
 from Linear_Systems.linear_system_solver import LinearSystemSolver
-from Linear_Systems.lu_decomposition import LUDecomposition
-from Linear_Systems.matrix_norms import frobenius_norm, condition_number
+from Linear_Systems.lu_decomposition import LUDecomposition, LUFactorization
+from Linear_Systems.cholesky_decomposition import CholeskyDecomposition, LDLDecomposition, CholeskyFactorization, LDLFactorization
+from Linear_Systems.streaming_least_squares import StreamingLeastSquares
+from Linear_Systems.matrix_norms import frobenius_norm, one_norm, two_norm, inf_norm, matrix_norm, inverse_norm, condition_number
+from Linear_Systems.sparse_matrix import CSRMatrix
+from Linear_Systems.tridiagonal_solver import TridiagonalSolver
+from Linear_Systems.preconditioners import JacobiPreconditioner, SSORPreconditioner, ILUPreconditioner
+from Linear_Systems.krylov_solvers import ConjugateGradient, GMRES, BiCGSTAB
 
 
 ''' Nonlinear Equations '''
@@ -56,4 +68,5 @@ from Taylor_Table.fd_taylor_table import fd_taylor_table
 from Relaxation.classical_relaxation import ClassicalRelaxation
 from Relaxation.point_jacobean import PointJacobeanRelaxation
 from Relaxation.guass_seidel import GuassSeidelRelaxation
-from Relaxation.successive_over_relaxation import SuccessiveOverRelaxation
\ No newline at end of file
+from Relaxation.successive_over_relaxation import SuccessiveOverRelaxation
+from Relaxation.multigrid import Multigrid
\ No newline at end of file
@@ -0,0 +1,53 @@
+import numpy as np
+from collections import deque
+
+class IterationHistory(deque):
+    """
+    A sequence of iterates that only keeps what its policy asks for
+        "all"       every iterate
+        "none"      nothing
+        "last"      only the last `size` iterates
+        "every"     every `size`-th iterate (starting with the first)
+        "residual"  no iterates, only the residual norms
+    The residual norms (whatever quantity the solver compares against tol) are kept in self.residuals
+    for the same iterations as the iterates, except under "residual" which keeps all of them, so "last" and "every"
+    stay bounded (resp. thinned out) however many iterations the solver runs
+    """
+
+    policies = ("all", "none", "last", "every", "residual")
+
+    def __init__(self, policy="all", size=None):
+        if policy not in self.policies:
+            raise ValueError(f"policy must be one of {self.policies}. Currently {policy}")
+        if policy in ("last", "every") and (size is None or size < 1):
+            raise ValueError(f"The '{policy}' policy requires a positive size.")
+
+        # a bounded deque drops the oldest iterate in O(1) once it is full
+        maxlen = size if policy == "last" else None
+        super(IterationHistory, self).__init__(maxlen=maxlen)
+
+        self.policy = policy
+        self.size = size
+        self.residuals = deque(maxlen=maxlen)
+        self.count = 0
+
+    @property
+    def keeps_iterates(self):
+        # solvers that have to do extra work to form X can skip it when it won't be kept
+        return self.policy in ("all", "last", "every")
+
+    def append(self, X, residual=None):
+        k = self.count
+        self.count += 1
+
+        if self.policy == "none" or (self.policy == "every" and k % self.size != 0):
+            return
+        if residual is not None:
+            self.residuals.append(float(residual))
+        if self.keeps_iterates:
+            super(IterationHistory, self).append(self._copy(X))
+
+    @staticmethod
+    def _copy(X):
+        # the solvers update their iterates in place, so arrays need to be copied
+        return X.copy() if isinstance(X, np.ndarray) else X